@@ -0,0 +1,193 @@
+# Benchmark-Suite gegen den lokalen Mock-Server (benchmarks/mock_server.py)
+# Aufruf: python -m benchmarks.bench_client [--latency 0.005] [--docs 2000] [--props 40] [--page-size 200]
+#         [--blob-size 4194304] [--iterations 20] [--json ergebnis.json]
+# Der Mock läuft in einem eigenen Prozess, damit die Speichermessung nur den Client erfasst.
+# Speicher je Benchmark: Spitze der Python-Allokationen (tracemalloc) während eines zusätzlichen, nicht
+# zeitgemessenen Durchlaufs. ru_maxrss ist der Höchststand des ganzen Prozesses und wird nur am Ende ausgegeben.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from dvelopdmspy.decoder import Projection
+from dvelopdmspy.dvelopdmspy import DvelopDmsPy, sanitize_doc
+from benchmarks.mock_server import mock_document
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_mib():
+    # ru_maxrss ist unter Linux in KiB, unter macOS in Bytes angegeben
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / 2 ** 20
+    return peak / 2 ** 10
+
+
+def alloc_peak_mib(func: Callable[[], int]) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def measure(name: str, func: Callable[[], int], iterations: int, unit: str) -> Dict:
+    # func liefert die Anzahl verarbeiteter Einheiten (Dokumente, Bytes, Aufrufe)
+    func()
+    latencies = []
+    units = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        units += func()
+        latencies.append(time.perf_counter() - op_started)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "name": name,
+        "iterations": iterations,
+        "unit": unit,
+        "throughput": units / elapsed if elapsed else 0.0,
+        "ops_per_s": iterations / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "alloc_peak_mib": alloc_peak_mib(func),
+    }
+
+
+def start_mock(args) -> (subprocess.Popen, str):
+    cmd = [sys.executable, "-m", "benchmarks.mock_server", "--latency", str(args.latency), "--docs", str(args.docs),
+           "--props", str(args.props), "--page-size", str(args.page_size), "--blob-size", str(args.blob_size)]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline().strip()
+    if not line.startswith("listening on "):
+        process.kill()
+        raise RuntimeError(f"mock server did not start: {line!r}")
+    return process, line[len("listening on "):]
+
+
+def run_suite(host: str, args, work_dir: str) -> List[Dict]:
+    results = []
+    upload_file = os.path.join(work_dir, "upload.bin")
+    with open(upload_file, "wb") as f:
+        f.write(os.urandom(args.blob_size))
+    download_file = os.path.join(work_dir, "download.bin")
+
+    # Ohne Cache, damit jede Wiederholung tatsächlich Anfragen stellt
+    with DvelopDmsPy(host, "bench-key", scheme="http", use_cache=False, default_page_size=args.page_size) as dvelop:
+        raw_docs = [mock_document(i, args.props) for i in range(args.page_size)]
+        results.append(measure("sanitize_doc", lambda: len([sanitize_doc(doc) for doc in raw_docs]),
+                               args.iterations, "docs"))
+
+        projection = Projection(["property_caption", "property_state", "property_editor"])
+        results.append(measure("sanitize_doc (3 properties)",
+                               lambda: len([sanitize_doc(doc, projection) for doc in raw_docs]),
+                               args.iterations, "docs"))
+
+        results.append(measure("get_documents (srm, all pages)", lambda: len(dvelop.get_documents()),
+                               max(1, args.iterations // 4), "docs"))
+
+        results.append(measure("get_documents (sharded by category)",
+                               lambda: len(dvelop.get_documents(shards="category")),
+                               max(1, args.iterations // 4), "docs"))
+
+        results.append(measure("iter_documents (prefetch=2)", lambda: sum(1 for _ in dvelop.iter_documents(prefetch=2)),
+                               max(1, args.iterations // 4), "docs"))
+
+        doc_ids = [f"P{i:08d}" for i in range(args.docs)]
+        counter = iter(range(10 ** 9))
+        results.append(measure("get_documents (o2m by id)",
+                               lambda: len(dvelop.get_documents(doc_id=doc_ids[next(counter) % len(doc_ids)])),
+                               args.iterations * 5, "docs"))
+
+        results.append(measure("get_documents_by_ids (500 ids)",
+                               lambda: len(dvelop.get_documents_by_ids(doc_ids[:500])[0]),
+                               max(1, args.iterations // 4), "docs"))
+
+        results.append(measure("update_properties (PUT)",
+                               lambda: int(dvelop.update_properties("P00000001", [], state_change=False)),
+                               args.iterations, "calls"))
+
+        results.append(measure("archive_file", lambda: args.blob_size if dvelop.archive_file(
+            upload_file, "c-1", []) else 0, args.iterations, "bytes"))
+
+        dl_href = f"/dms/r/{dvelop._rest_adapter.repository}/o/P00000001/v/current/b/main/c"
+        results.append(measure("download_doc_blob", lambda: args.blob_size if dvelop.download_doc_blob(
+            "P00000001", download_file, dl_href=dl_href, resume=False) else 0, args.iterations, "bytes"))
+
+        results.append(measure("get_users", lambda: len(dvelop.get_users()), args.iterations, "users"))
+    return results
+
+
+def print_results(results: List[Dict], args):
+    print(f"mock: latency={args.latency * 1000:.1f}ms docs={args.docs} props={args.props} "
+          f"page_size={args.page_size} blob_size={args.blob_size}")
+    print(f"{'benchmark':34} {'throughput':>18} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'Alloc MiB':>9}")
+    for r in results:
+        if r["unit"] == "bytes":
+            throughput = f"{r['throughput'] / 2 ** 20:10.1f} MiB/s"
+        else:
+            throughput = f"{r['throughput']:10.1f} {r['unit']}/s"
+        print(f"{r['name']:34} {throughput:>18} {r['ops_per_s']:9.1f} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+              f"{r['p99_ms']:9.2f} {r['alloc_peak_mib']:9.1f}")
+    decode = next(r for r in results if r["name"] == "sanitize_doc")
+    print(f"decode cost: {1e6 / decode['throughput']:.1f} us/doc ({args.props} properties)")
+    rss = peak_rss_mib()
+    if rss is not None:
+        print(f"process peak RSS (whole run): {rss:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.005, help="Verzögerung des Mocks je Anfrage (s)")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--props", type=int, default=40)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--blob-size", type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--host", help="Bereits laufenden Mock-Server verwenden (127.0.0.1:<port>)")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON speichern")
+    args = parser.parse_args()
+
+    process = None
+    host = args.host
+    if host is None:
+        process, host = start_mock(args)
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = run_suite(host, args, work_dir)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print_results(results, args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results, "process_peak_rss_mib": peak_rss_mib()}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
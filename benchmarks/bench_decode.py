@@ -0,0 +1,96 @@
+# Micro-Benchmark: Dekodierung von srm-Trefferseiten zu DmsDocument
+# Aufruf: python -m benchmarks.bench_decode [--docs 1000] [--props 40] [--repeat 5]
+import argparse
+import time
+import uuid
+
+import humps
+
+from dvelopdmspy.dvelopdmspy import sanitize_doc
+from dvelopdmspy.models import DmsDocument
+
+
+def legacy_sanitize_doc(doc_dict) -> DmsDocument:
+    # Bisheriger Weg über humps.decamelize als Vergleichsbasis
+    doc = dict(humps.decamelize(doc_dict))
+    doc["id_"] = doc.pop("id")
+    doc["links"] = doc.pop("_links")
+    return DmsDocument(**doc)
+
+
+def make_document(index: int, n_props: int) -> dict:
+    repo = "0a1b2c3d-repo"
+    doc_id = f"P{index:08d}"
+    base = f"/dms/r/{repo}/o2m/{doc_id}"
+    category, category_display = ("c-1", "Rechnung") if index % 2 == 0 else ("c-2", "Vertrag")
+    properties = [
+        {"key": "property_filename", "value": f"scan_{index}.pdf"},
+        {"key": "property_filetype", "value": "pdf"},
+        {"key": "property_filemimetype", "value": "application/pdf"},
+        {"key": "property_caption", "value": f"Rechnung {index}"},
+        {"key": "property_state", "value": "Release"},
+        {"key": "property_editor", "value": "u-1", "displayValue": "Mustermann Max"},
+        {"key": "property_owner", "value": "u-2", "displayValue": "Musterfrau Erika"},
+        {"key": "property_category", "value": category, "displayValue": category_display},
+        {"key": "property_creation_date", "value": f"2023-05-{1 + index % 28:02d}T10:11:12.000+02:00"},
+        {"key": "property_last_modified_date", "value": "2023-06-04T10:11:12.000+02:00"},
+        # Je 50 Dokumente mit gleichem Änderungszeitpunkt, wie bei Massenänderungen im DMS
+        {"key": "property_last_alteration_date", "value": f"2023-07-{1 + index // 50 % 28:02d}T10:11:12.000+02:00"},
+        {"key": "property_access_date", "value": "2023-08-04T10:11:12.000+02:00"},
+    ]
+    for i in range(max(0, n_props - len(properties))):
+        if i % 5 == 0:
+            properties.append({"key": str(uuid.UUID(int=i)), "value": None, "isMultiValue": True,
+                               "values": {"1": f"a{i}", "2": f"b{i}"}, "displayValue": f"a{i}, b{i}"})
+        else:
+            properties.append({"key": str(uuid.UUID(int=i)), "value": f"Wert {i}", "isMultiValue": False,
+                               "displayValue": f"Wert {i}"})
+    links = {name: {"href": f"{base}/{name}"} for name in
+             ("self", "previewReadonly", "deleteWithReason", "mainblobcontent", "pdfblobcontent",
+              "updateWithContent", "update", "linkDmsObject", "versions", "displayVersion", "notes")}
+    return {"id": doc_id, "sourceCategories": [category], "sourceProperties": properties, "_links": links}
+
+
+def fields(obj) -> dict:
+    return {name: getattr(obj, name) for name in obj.__slots__}
+
+
+def run(decode, pages, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            for doc in page:
+                decode(doc)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--props", type=int, default=40)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = [make_document(i, args.props) for i in range(args.docs)]
+    pages = [docs[i:i + args.page_size] for i in range(0, len(docs), args.page_size)]
+
+    # Beide Wege müssen dieselben Attribute liefern
+    for raw in docs[:10]:
+        old, new = legacy_sanitize_doc(raw), sanitize_doc(raw)
+        assert fields(old.links) == fields(new.links)
+        assert [fields(p) for p in old.source_properties] == [fields(p) for p in new.source_properties]
+
+    legacy = run(legacy_sanitize_doc, pages, args.repeat)
+    current = run(sanitize_doc, pages, args.repeat)
+    print(f"{args.docs} documents, {args.props} properties each, pages of {args.page_size}")
+    print(f"humps.decamelize: {legacy * 1e6 / args.docs:8.1f} us/doc")
+    print(f"decoder:          {current * 1e6 / args.docs:8.1f} us/doc")
+    print(f"speedup:          {legacy / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Speicherbedarf dekodierter Dokumente (Treffer aus srm)
+# Aufruf: python -m benchmarks.bench_memory [--docs 20000] [--props 40] [--touch]
+import argparse
+import gc
+import json
+import tracemalloc
+
+from benchmarks.bench_decode import make_document
+from dvelopdmspy.dvelopdmspy import sanitize_doc
+
+
+def measure(payload: bytes, touch: bool) -> int:
+    # Nur die behaltenen Dokumente zählen, die Rohantwort wird wie im Client verworfen
+    gc.collect()
+    tracemalloc.start()
+    docs = [sanitize_doc(raw) for raw in json.loads(payload)]
+    if touch:
+        for doc in docs:
+            _ = doc.editor, doc.state, doc.last_alteration, doc.creation_date, doc.links.mainblobcontent
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del docs
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--props", type=int, default=40)
+    parser.add_argument("--touch", action="store_true", help="Standardfelder und Links einmal lesen")
+    args = parser.parse_args()
+
+    payload = json.dumps([make_document(i, args.props) for i in range(args.docs)]).encode()
+    used = measure(payload, args.touch)
+    print(f"{args.docs} documents, {args.props} properties each{' (fields touched)' if args.touch else ''}")
+    print(f"retained: {used / 2 ** 20:8.1f} MiB")
+    print(f"per doc:  {used / args.docs:8.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
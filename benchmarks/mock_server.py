@@ -0,0 +1,282 @@
+# Lokaler Ersatz für die vom Paket genutzten d.velop-DMS-Endpunkte, für Benchmarks ohne Netzwerkzugriff
+# Aufruf: python -m benchmarks.mock_server [--port 8080] [--latency 0.01] [--docs 1000] [--props 40]
+#         [--page-size 100] [--blob-size 1048576]
+# Der Client wird mit scheme="http" und hostname="127.0.0.1:<port>" verbunden.
+import argparse
+import functools
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from benchmarks.bench_decode import make_document
+
+REPOSITORY = "bench-repo"
+
+_O2M_PATTERN = re.compile(r"^/dms/r/[^/]+/o2m/([^/]+)(/v/current)?$")
+_BLOB_PATTERN = re.compile(r"^/dms/r/[^/]+/o/([^/]+)/v/current/b/main/c$")
+
+
+class MockConfig:
+    def __init__(self, latency: float = 0.0, docs: int = 1000, props: int = 40, page_size: int = 100,
+                 blob_size: int = 1024 * 1024):
+        self.latency = latency
+        self.docs = docs
+        self.props = props
+        self.page_size = page_size
+        self.blob_size = blob_size
+        # Per PUT geänderte Dokumente: ID -> neuer Änderungszeitpunkt
+        self.edits = {}
+
+
+def mock_document(index: int, n_props: int) -> dict:
+    doc = make_document(index, n_props)
+    base = f"/dms/r/{REPOSITORY}"
+    doc_id = doc["id"]
+    doc["_links"] = {
+        "self": {"href": f"{base}/o2m/{doc_id}"},
+        "update": {"href": f"{base}/o2m/{doc_id}"},
+        "updateWithContent": {"href": f"{base}/o2m/{doc_id}/v/current"},
+        "deleteWithReason": {"href": f"{base}/o2m/{doc_id}"},
+        "mainblobcontent": {"href": f"{base}/o/{doc_id}/v/current/b/main/c"},
+        "pdfblobcontent": {"href": f"{base}/o/{doc_id}/v/current/b/p1/c"},
+        "versions": {"href": f"{base}/o/{doc_id}/v"},
+        "displayVersion": {"href": f"{base}/o/{doc_id}/v/current"},
+        "notes": {"href": f"{base}/o/{doc_id}/n"},
+    }
+    return doc
+
+
+@functools.lru_cache(maxsize=100000)
+def _cached_document(index: int, n_props: int) -> dict:
+    # Für Filter und Sortierung werden alle Dokumente benötigt, erzeugt werden sie nur einmal
+    return mock_document(index, n_props)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Header und Inhalt werden getrennt geschrieben, ohne TCP_NODELAY bremst Delayed-ACK jede Antwort aus
+    disable_nagle_algorithm = True
+    config: MockConfig = MockConfig()
+    blob: bytes = b""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body=b"", content_type: str = "application/hal+json", headers: dict = None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _wait(self):
+        if self.config.latency:
+            time.sleep(self.config.latency)
+
+    def _doc_index(self, doc_id: str):
+        # IDs haben die Form P00000042
+        try:
+            index = int(doc_id[1:])
+        except ValueError:
+            return None
+        if not doc_id.startswith("P") or not 0 <= index < self.config.docs:
+            return None
+        return index
+
+    def do_GET(self):
+        self._wait()
+        parts = urlsplit(self.path)
+        path, query = parts.path, parse_qs(parts.query)
+        if path == "/dms/r/" or path == "/dms/r":
+            return self._reply(200, {"repositories": [{"id": REPOSITORY, "name": "Benchmark"}]})
+        if path.endswith("/source"):
+            return self._reply(200, self._source())
+        if path.endswith("/srm"):
+            return self._search(path, query)
+        if path.endswith("/identityprovider/scim/Users"):
+            return self._reply(200, self._users())
+        match = _BLOB_PATTERN.match(path)
+        if match:
+            return self._download(match.group(1))
+        match = _O2M_PATTERN.match(path)
+        if match:
+            index = self._doc_index(match.group(1))
+            if index is None:
+                return self._reply(404, {"reason": "Document not found"})
+            return self._reply(200, self._edited(mock_document(index, self.config.props)))
+        self._reply(404, {"reason": "Unknown endpoint"})
+
+    def do_POST(self):
+        body = self._read_body()
+        self._wait()
+        path = urlsplit(self.path).path
+        if "/blob/chunk" in path:
+            # Jeder Block liefert eine neue Location, an die der nächste Block geht
+            return self._reply(201, headers={"Location": f"/dms/r/{REPOSITORY}/blob/chunk/{time.monotonic_ns()}"
+                                                         f"-{len(body)}"})
+        if path.endswith("/o2m"):
+            return self._reply(201, headers={"Location": f"/dms/r/{REPOSITORY}/o/P{self.config.docs:08d}"
+                                                         f"?sourceid=/dms/r/{REPOSITORY}/source"})
+        self._reply(404, {"reason": "Unknown endpoint"})
+
+    def do_PUT(self):
+        self._read_body()
+        self._wait()
+        match = _O2M_PATTERN.match(urlsplit(self.path).path)
+        if match is None or self._doc_index(match.group(1)) is None:
+            return self._reply(404, {"reason": "Document not found"})
+        self.config.edits[match.group(1)] = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self._reply(200, headers={"Location": f"/dms/r/{REPOSITORY}/o/{match.group(1)}"})
+
+    def do_DELETE(self):
+        self._read_body()
+        self._wait()
+        match = _O2M_PATTERN.match(urlsplit(self.path).path)
+        if match is None or self._doc_index(match.group(1)) is None:
+            return self._reply(404, {"reason": "Document not found"})
+        self._reply(204)
+
+    def _source(self) -> dict:
+        properties = [{"key": str(uuid.UUID(int=i)), "type": "String", "displayName": f"Eigenschaft {i}"}
+                      for i in range(self.config.props)]
+        categories = [{"key": "c-1", "displayName": "Rechnung"}, {"key": "c-2", "displayName": "Vertrag"}]
+        return {"id": f"/dms/r/{REPOSITORY}/source", "displayName": "Benchmark", "properties": properties,
+                "categories": categories}
+
+    def _search(self, path: str, query: dict):
+        page = int(query.get("page", ["1"])[0])
+        page_size = int(query.get("pagesize", [str(self.config.page_size)])[0])
+        filters = json.loads(query["sourceproperties"][0]) if "sourceproperties" in query else {}
+        wanted = filters.pop("property_document_id", None)
+        if "sourcecategories" in query:
+            filters["property_category"] = json.loads(query["sourcecategories"][0])
+        if wanted is not None:
+            indexes = sorted(i for i in (self._doc_index(doc_id) for doc_id in wanted) if i is not None)
+        else:
+            indexes = range(self.config.docs)
+        sort_key = query.get("sourcesortproperty", [None])[0]
+        if filters or sort_key:
+            # Nur für Filter und Sortierung werden alle Treffer erzeugt
+            docs = [self._edited(_cached_document(i, self.config.props)) for i in indexes]
+            docs = [doc for doc in docs if all(_matches(_prop_value(doc, key), values)
+                                               for key, values in filters.items())]
+            if sort_key:
+                docs.sort(key=lambda doc: _prop_value(doc, sort_key) or "",
+                          reverse=query.get("ascending", ["true"])[0] == "false")
+            items = docs[(page - 1) * page_size: page * page_size]
+            total = len(docs)
+        else:
+            items = [self._edited(mock_document(i, self.config.props))
+                     for i in indexes[(page - 1) * page_size: page * page_size]]
+            total = len(indexes)
+        links = {"self": {"href": self.path}}
+        if page * page_size < total:
+            next_query = {name: values[0] for name, values in query.items()}
+            next_query["page"] = str(page + 1)
+            links["next"] = {"href": f"{path}?{urlencode(next_query)}"}
+        self._reply(200, {"items": items, "_links": links})
+
+    def _edited(self, doc: dict) -> dict:
+        last_alteration = self.config.edits.get(doc["id"])
+        if last_alteration is None:
+            return doc
+        doc = dict(doc)
+        doc["sourceProperties"] = [dict(prop, value=last_alteration) if prop["key"] == "property_last_alteration_date"
+                                   else prop for prop in doc["sourceProperties"]]
+        return doc
+
+    def _download(self, doc_id: str):
+        if self._doc_index(doc_id) is None:
+            return self._reply(404, {"reason": "Document not found"})
+        blob = self.blob
+        etag = f'"{doc_id}-{self.config.edits.get(doc_id, "0")}"'
+        range_header = self.headers.get("Range")
+        # Mit If-Range gilt der Range-Header nur, solange der Blob unverändert ist
+        if range_header and self.headers.get("If-Range") not in (None, etag):
+            range_header = None
+        if range_header:
+            start = int(range_header.split("=")[1].split("-")[0])
+            if start >= len(blob):
+                return self._reply(416, headers={"Content-Range": f"bytes */{len(blob)}"})
+            return self._reply(206, blob[start:], "application/octet-stream",
+                               {"Content-Range": f"bytes {start}-{len(blob) - 1}/{len(blob)}", "ETag": etag})
+        self._reply(200, blob, "application/octet-stream", {"ETag": etag})
+
+    @staticmethod
+    def _users() -> dict:
+        return {"resources": [{"id": f"u-{i}", "userName": f"user{i}", "displayName": f"User {i}",
+                               "name": {"givenName": "Max", "familyName": f"Mustermann {i}"},
+                               "emails": [{"value": f"user{i}@example.com"}]} for i in range(50)]}
+
+
+def _prop_value(doc: dict, key: str):
+    for prop in doc["sourceProperties"]:
+        if prop["key"] == key:
+            return prop.get("value")
+    return None
+
+
+def _matches(value, values: list) -> bool:
+    # Mehrere Werte sind ODER-verknüpft, "von|bis" ist eine Bereichssuche mit optional offenen Grenzen.
+    # Zeitstempel werden wie im Mock erzeugt (gleiche Zeitzone) als Zeichenkette verglichen.
+    for expected in values:
+        if isinstance(expected, str) and "|" in expected:
+            lower, upper = expected.split("|", 1)
+            if value is not None and (not lower or value >= lower) and (not upper or value <= upper):
+                return True
+        elif value == expected:
+            return True
+    return False
+
+
+def make_blob(size: int) -> bytes:
+    return (bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def start_server(config: MockConfig, port: int = 0) -> ThreadingHTTPServer:
+    # Startet den Server in einem Hintergrund-Thread und liefert ihn zurück (Port: server.server_port)
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"config": config, "blob": make_blob(config.blob_size)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-dms", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Verzögerung je Anfrage in Sekunden")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--props", type=int, default=40)
+    parser.add_argument("--page-size", type=int, default=100, help="Seitengröße, wenn der Client keine angibt")
+    parser.add_argument("--blob-size", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    server = start_server(MockConfig(latency=args.latency, docs=args.docs, props=args.props,
+                                     page_size=args.page_size, blob_size=args.blob_size), port=args.port)
+    # Die erste Zeile nennt den Port, damit aufrufende Prozesse ihn auslesen können
+    print(f"listening on 127.0.0.1:{server.server_port}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
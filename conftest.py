@@ -0,0 +1,2 @@
+# Liegt im Hauptverzeichnis, damit pytest es in sys.path aufnimmt und die Tests
+# benchmarks.mock_server importieren können
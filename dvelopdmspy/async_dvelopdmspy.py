@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, BinaryIO, Callable, Dict, Iterable, List, Tuple, Union
+
+from dvelopdmspy.async_rest_adapter import AsyncRestAdapter
+from dvelopdmspy.blob import DEFAULT_CHUNK_SIZE, iter_chunks, read_part_validator, remove_part_validator, \
+    write_part_validator
+from dvelopdmspy.dvelopdmspy import DvelopDmsBase, sanitize_user
+from dvelopdmspy.exceptions import BlobChangedException, DvelopDMSPyException
+from dvelopdmspy.metrics import Event
+from dvelopdmspy.models import DmsDocument, DmsUser, Mappings
+from dvelopdmspy.throttle import RetryPolicy
+
+
+async def _aiter_chunks(source, chunk_size: int) -> AsyncIterator[bytes]:
+    # Asynchrone Quellen werden direkt durchgereicht, Dateien und synchrone Iteratoren
+    # werden in einem Thread gelesen, damit die Event-Loop nicht blockiert
+    if hasattr(source, "__aiter__"):
+        async for chunk in source:
+            yield chunk
+        return
+    chunks = iter_chunks(source, chunk_size)
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+class AsyncDvelopDmsPy(DvelopDmsBase):
+    def __init__(self, hostname: str, api_key: str, repository: str = None,
+                 logger: logging.Logger = None, user_agent: str = "DvelopDmsPy/1.0",
+                 max_connections: int = 100, max_keepalive_connections: int = 20, max_concurrency: int = 100,
+                 timeout: float = 60.0, default_page_size: int = None, scheme: str = "https",
+                 rate_limit: float = None, max_retries: int = 3, hooks: Iterable[Callable[[Event], None]] = None):
+        # Die Mappings werden erst mit open() bzw. "async with" geladen
+        self._rest_adapter = AsyncRestAdapter(hostname, api_key, repository, logger, user_agent,
+                                              max_connections=max_connections,
+                                              max_keepalive_connections=max_keepalive_connections,
+                                              max_concurrency=max_concurrency, timeout=timeout, scheme=scheme,
+                                              rate_limit=rate_limit, retry_policy=RetryPolicy(max_retries=max_retries),
+                                              hooks=hooks)
+        self.default_page_size = default_page_size
+        self._source_mappings = None
+
+    async def open(self):
+        await self._rest_adapter.open()
+        if self._source_mappings is None:
+            self._source_mappings = await self.get_mappings()
+        return self
+
+    async def close(self):
+        await self._rest_adapter.aclose()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def get_mappings(self) -> Mappings:
+        t_result = await self._rest_adapter.get(endpoint='source')
+        return self._mappings_from_data(t_result.data)
+
+    async def refresh_mappings(self) -> Mappings:
+        mappings = await self.get_mappings()
+        self._source_mappings = mappings
+        return mappings
+
+    async def update_properties(self, doc_id: str, properties: list, alteration_msg: str = None,
+                                state_change: bool = True):
+        update_doc_endpoint, post_body = self._update_request(doc_id, properties, alteration_msg=alteration_msg,
+                                                              state_change=state_change)
+        result = await self._rest_adapter.put(endpoint=update_doc_endpoint, data=post_body)
+        if result.status_code > 299:
+            raise DvelopDMSPyException(result.message)
+        return True
+
+    async def set_state_editor(self, doc_id: str, editor_id: str = None, state_string: str = None,
+                               alteration_msg: str = None, doc: DmsDocument = None):
+        if not editor_id and not state_string:
+            return True
+
+        if not editor_id or not state_string:
+            the_doc: DmsDocument
+            if doc is not None:
+                the_doc = doc
+            else:
+                try:
+                    the_doc = (await self.get_documents(doc_id=doc_id))[0]
+                except (TypeError, IndexError) as e:
+                    raise DvelopDMSPyException(str(e))
+
+            if not editor_id:
+                editor_id = the_doc.editor
+            if not state_string:
+                state_string = the_doc.state
+        if not alteration_msg:
+            alteration_msg = "changed state and/or editor by script"
+
+        props = self.add_upload_property(display_name="", pvalue=editor_id, prop_guid="property_editor")
+        props = self.add_upload_property(display_name="", pvalue=state_string, prop_guid="property_state", plist=props)
+        return await self.update_properties(doc_id=doc_id, properties=props, alteration_msg=alteration_msg)
+
+    async def delete_document(self, doc_id: str = None, delete_reason: str = None):
+        await self._rest_adapter.delete(endpoint=f"o2m/{doc_id}", data={"reason": delete_reason})
+        return True
+
+    async def archive_file(self,
+                           filepath: Union[str, os.PathLike, BinaryIO, Iterable[bytes]],
+                           category_id: str,
+                           properties: list[dict],
+                           doc_id: str = None,
+                           alteration_msg: str = None,
+                           filename: str = None,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           max_chunk_retries: int = 3) -> str:
+        filename = self._archive_filename(filepath, filename)
+        try:
+            blob_location = await self._rest_adapter.upload_blob(_aiter_chunks(filepath, chunk_size),
+                                                                 max_chunk_retries=max_chunk_retries)
+        except IOError as e:
+            raise DvelopDMSPyException("Blob upload failed") from e
+
+        http_method, blob_to_doc_endpoint, post_body = self._archive_request(filename, category_id, properties,
+                                                                             blob_location, doc_id=doc_id,
+                                                                             alteration_msg=alteration_msg)
+        if http_method == 'PUT':
+            result = await self._rest_adapter.put(endpoint=blob_to_doc_endpoint, data=post_body)
+        else:
+            result = await self._rest_adapter.post(endpoint=blob_to_doc_endpoint, data=post_body)
+        if result.status_code > 299:
+            raise DvelopDMSPyException(result.message)
+        return self._doc_id_from_location(result.headers.get("Location"))
+
+    async def get_documents(self,
+                            properties: dict = None,
+                            categories: list = None,
+                            limit: int = None,
+                            doc_id: str = None,
+                            fulltext: str = None,
+                            page_size: int = None,
+                            select: List[str] = None,
+                            select_links: bool = False) -> List[DmsDocument]:
+        projection = self._projection(select, select_links)
+        if doc_id is not None:
+            endpoint = f"o2m/{doc_id}"
+            params = self._search_params(properties=properties, categories=categories, fulltext=fulltext)
+        else:
+            endpoint = "srm"
+            params = self._search_params(properties=properties, categories=categories, fulltext=fulltext,
+                                         page_size=self._page_size(limit, page_size))
+
+        result = await self._rest_adapter.get(endpoint=endpoint, ep_params=params, limit=limit)
+        if type(result.data) is list:
+            return self._decode_docs(result.data, projection)
+        return self._decode_docs([result.data], projection)
+
+    async def iter_documents(self,
+                             properties: dict = None,
+                             categories: list = None,
+                             limit: int = None,
+                             fulltext: str = None,
+                             page_size: int = None,
+                             select: List[str] = None,
+                             select_links: bool = False) -> AsyncIterator[DmsDocument]:
+        if limit is not None and limit <= 0:
+            return
+        projection = self._projection(select, select_links)
+        params = self._search_params(properties=properties, categories=categories, fulltext=fulltext,
+                                     page_size=self._page_size(limit, page_size))
+        doc_count = 0
+        async for page in self._rest_adapter.iter_pages(endpoint="srm", ep_params=params):
+            if limit is not None:
+                page = page[:limit - doc_count]
+            for doc in self._decode_docs(page, projection):
+                yield doc
+                doc_count += 1
+                if limit is not None and doc_count >= limit:
+                    return
+
+    async def get_documents_by_ids(self, doc_ids: Iterable[str], batch_size: int = 100,
+                                   use_search: bool = True, select: List[str] = None,
+                                   select_links: bool = False) -> Tuple[Dict[str, DmsDocument], List[str]]:
+        # Wie DvelopDmsPy.get_documents_by_ids, die Parallelität begrenzt max_concurrency des Clients
+        t_ids = self._unique_ids(doc_ids)
+        found = {}
+        projection = self._projection(select, select_links)
+
+        async def by_id(doc_id: str):
+            try:
+                t_docs = await self.get_documents(doc_id=doc_id, select=select, select_links=select_links)
+            except DvelopDMSPyException:
+                return
+            if t_docs:
+                found[doc_id] = t_docs[0]
+
+        async def by_search(batch: List[str]):
+            try:
+                result = await self._rest_adapter.get(endpoint="srm", ep_params=self._id_search_params(batch))
+            except DvelopDMSPyException:
+                await asyncio.gather(*(by_id(doc_id) for doc_id in batch))
+                return
+            wanted = set(batch)
+            for t_doc in self._decode_docs(result.data, projection):
+                if t_doc.id_ in wanted:
+                    found[t_doc.id_] = t_doc
+
+        if use_search:
+            await asyncio.gather(*(by_search(batch) for batch in self._id_batches(t_ids, batch_size)))
+        else:
+            await asyncio.gather(*(by_id(doc_id) for doc_id in t_ids))
+        return self._by_ids_result(t_ids, found)
+
+    async def get_users(self) -> List[DmsUser]:
+        result = await self._rest_adapter.get_identity(endpoint="scim/Users")
+        return [sanitize_user(entry) for entry in result.data.get("resources")]
+
+    async def _blob_url(self, doc_id: str, dl_href: str = None) -> str:
+        if dl_href is None:
+            t_docs = await self.get_documents(doc_id=doc_id)
+            if len(t_docs) == 0:
+                raise DvelopDMSPyException("Document not found.")
+            dl_href = t_docs[0].links.mainblobcontent
+        return f"{self._rest_adapter.host_url}{dl_href}"
+
+    async def iter_doc_blob(self, doc_id: str, dl_href: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            max_resume_attempts: int = 3) -> AsyncIterator[bytes]:
+        url = await self._blob_url(doc_id, dl_href)
+        async for chunk in self._rest_adapter.iter_blob(url, chunk_size=chunk_size,
+                                                        max_resume_attempts=max_resume_attempts):
+            yield chunk
+
+    async def download_doc_blob(self, doc_id: str, dest_file: str, dl_href: str = None,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = True,
+                                max_resume_attempts: int = 3) -> bool:
+        url = await self._blob_url(doc_id, dl_href)
+        # Fortsetzen und Neubeginn wie DvelopDmsPy._download_to_file
+        part_file = f"{dest_file}.part"
+        offset = 0
+        if_range = None
+        if resume and os.path.exists(part_file):
+            if_range = read_part_validator(part_file, url)
+            if if_range is not None:
+                offset = os.path.getsize(part_file)
+
+        try:
+            await self._write_part_file(url, part_file, offset, if_range, chunk_size, max_resume_attempts)
+        except BlobChangedException:
+            if offset == 0:
+                raise
+            await self._write_part_file(url, part_file, 0, None, chunk_size, max_resume_attempts)
+
+        os.replace(part_file, dest_file)
+        remove_part_validator(part_file)
+        return True
+
+    async def _write_part_file(self, url: str, part_file: str, offset: int, if_range: str, chunk_size: int,
+                               max_resume_attempts: int):
+        blob_info = {}
+        written = False
+        if offset == 0:
+            remove_part_validator(part_file)
+        with open(part_file, 'ab' if offset else 'wb') as out_file:
+            async for chunk in self._rest_adapter.iter_blob(url, offset=offset, chunk_size=chunk_size,
+                                                            max_resume_attempts=max_resume_attempts,
+                                                            if_range=if_range, blob_info=blob_info):
+                if offset == 0 and not written:
+                    write_part_validator(part_file, url, blob_info.get("validator"))
+                    written = True
+                await asyncio.to_thread(out_file.write, chunk)
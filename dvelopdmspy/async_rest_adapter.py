@@ -0,0 +1,416 @@
+import asyncio
+import logging
+import time
+from json import JSONDecodeError
+from typing import AsyncIterator, Callable, Dict, Iterable, List
+
+from dvelopdmspy.blob import DEFAULT_CHUNK_SIZE, check_blob_validator, parse_content_range_total
+from dvelopdmspy.cache import endpoint_class
+from dvelopdmspy.exceptions import DvelopDMSPyException
+from dvelopdmspy.metrics import EVENT_BLOB_DOWNLOAD, EVENT_BLOB_UPLOAD, EVENT_PAGES, EVENT_REQUEST, Event, \
+    Instrumentation
+from dvelopdmspy.models import Result
+from dvelopdmspy.throttle import RetryPolicy, THROTTLE_STATUSES, TokenBucket, parse_retry_after
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class AsyncRestAdapter:
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, hostname: str, api_key: str, repository: str = None,
+                 logger: logging.Logger = None, user_agent: str = None,
+                 max_connections: int = 100, max_keepalive_connections: int = 20, max_concurrency: int = 100,
+                 timeout: float = 60.0, scheme: str = "https", rate_limit: float = None,
+                 retry_policy: RetryPolicy = None, hooks: Iterable[Callable[[Event], None]] = None):
+        if httpx is None:
+            raise DvelopDMSPyException("The async client requires httpx. "
+                                       "Install it with: pip install dvelopdmspy[async]")
+
+        self.user_agent = user_agent or f"python-httpx/{httpx.__version__}"
+        self._logger = logger or logging.getLogger(__name__)
+
+        # Ein gemeinsamer Verbindungspool für alle Anfragen dieses Adapters.
+        # max_concurrency begrenzt zusätzlich die Anzahl gleichzeitig laufender Anfragen.
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self._client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = TokenBucket(rate_limit)
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.instrumentation = Instrumentation(hooks, self._logger)
+
+        self.host_base = hostname
+        self.host_url = f"{scheme}://{hostname}"
+        self.repolist_url = f"{self.host_url}/dms/r/"
+        self.identity_url = f"{self.host_url}/identityprovider/"
+        self.api_key = api_key
+        self.repository = None
+        self.config_url = None
+        self.url = None
+        if repository is not None:
+            self._set_repository(repository)
+
+    def _set_repository(self, repository: str):
+        self.repository = repository
+        self.config_url = f"{self.host_url}/dmsconfig/r/{self.repository}/"
+        self.url = f"{self.host_url}/dms/r/{self.repository}/"
+
+    async def open(self):
+        # Wird kein Repository angegeben, wird das erste ausgelesen und gesetzt
+        if self.repository is None:
+            t_repos = await self.get(endpoint="", base_url=self.repolist_url)
+            self._set_repository(t_repos.data.get("repositories")[0].get("id"))
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def _build_headers(self, http_method: str, binary: bool = False) -> Dict:
+        headers = {
+            'User-Agent': self.user_agent,
+            'Authorization': f'Bearer {self.api_key}'
+        }
+
+        if binary:
+            headers['Accept'] = 'application/octet-stream'
+        else:
+            headers['Accept'] = 'application/hal+json'
+
+        if http_method == 'POST':
+            headers['Origin'] = self.host_url
+        return headers
+
+    async def _throttle(self):
+        wait = self.rate_limiter.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _record_status(self, status_code: int, headers) -> float:
+        retry_after = None
+        if status_code in THROTTLE_STATUSES:
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+            self.rate_limiter.on_throttled(retry_after)
+        else:
+            self.rate_limiter.on_success()
+        return retry_after
+
+    def _emit(self, kind: str, started: float, **kwargs):
+        kwargs["duration"] = time.perf_counter() - started
+        self.instrumentation.emit(Event(kind, **kwargs))
+
+    async def _send(self, http_method: str, url: str, headers: Dict, params: Dict = None, json: Dict = None,
+                    content: bytes = None) -> "httpx.Response":
+        if not self.instrumentation.enabled:
+            return await self._send_attempts(http_method=http_method, url=url, headers=headers, params=params,
+                                             json=json, content=content)
+        started = time.perf_counter()
+        retries = [0]
+        try:
+            response = await self._send_attempts(http_method=http_method, url=url, headers=headers, params=params,
+                                                 json=json, content=content, retries=retries)
+        except Exception as e:
+            self._emit(EVENT_REQUEST, started, method=http_method, endpoint_class=endpoint_class(url), url=url,
+                       retries=retries[0], error=e)
+            raise
+        self._emit(EVENT_REQUEST, started, method=http_method, endpoint_class=endpoint_class(url), url=url,
+                   status_code=response.status_code, bytes_in=len(response.content),
+                   bytes_out=len(response.request.content), retries=retries[0])
+        return response
+
+    async def _send_attempts(self, http_method: str, url: str, headers: Dict, params: Dict = None,
+                             json: Dict = None, content: bytes = None, retries: List[int] = None) -> "httpx.Response":
+        # Wie RestAdapter._send_attempts: Ratenbegrenzung und Wiederholung idempotenter Anfragen
+        attempt = 0
+        while True:
+            await self._throttle()
+            try:
+                async with self._semaphore:
+                    response = await self._client.request(method=http_method, url=url, headers=headers,
+                                                          params=params, json=json, content=content)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                if not self.retry_policy.can_retry(http_method, attempt):
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+                self._logger.debug(msg=f"method={http_method}, url={url}, retry in {delay:.2f}s after {e}")
+                attempt += 1
+                if retries is not None:
+                    retries[0] = attempt
+                await asyncio.sleep(delay)
+                continue
+
+            retry_after = self._record_status(response.status_code, response.headers)
+            if not self.retry_policy.should_retry_status(http_method, response.status_code, attempt):
+                return response
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            self._logger.debug(msg=f"method={http_method}, url={url}, status_code={response.status_code}, "
+                                   f"retry in {delay:.2f}s")
+            attempt += 1
+            if retries is not None:
+                retries[0] = attempt
+            await asyncio.sleep(delay)
+
+    async def get_identity(self, endpoint: str) -> Result:
+        return await self.get(endpoint=endpoint, base_url=self.identity_url)
+
+    async def get(self, endpoint: str, ep_params: Dict = None, base_url: str = None, limit: int = None) -> Result:
+        return await self._do(http_method='GET', endpoint=endpoint, ep_params=ep_params, base_url=base_url,
+                              limit=limit)
+
+    async def post(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
+        return await self._do(http_method='POST', endpoint=endpoint, ep_params=ep_params, data=data)
+
+    async def put(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
+        return await self._do(http_method='PUT', endpoint=endpoint, ep_params=ep_params, data=data)
+
+    async def delete(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
+        return await self._do(http_method='DELETE', endpoint=endpoint, ep_params=ep_params, data=data)
+
+    async def _request(self, http_method: str, url: str, headers: Dict, params: Dict = None, json: Dict = None,
+                       content: bytes = None) -> "httpx.Response":
+        log_line_pre = f"method={http_method}, url={url}"
+        log_line_post = ', '.join((log_line_pre, "success={}, status_code={}, message={}"))
+        try:
+            self._logger.debug(msg=log_line_pre)
+            response = await self._send(http_method=http_method, url=url, headers=headers, params=params, json=json,
+                                        content=content)
+        except httpx.HTTPError as e:
+            self._logger.debug(msg=(str(e)))
+            raise DvelopDMSPyException("Request failed") from e
+
+        is_success = 200 <= response.status_code <= 299
+        self._logger.debug(msg=log_line_post.format(is_success, response.status_code, response.reason_phrase))
+        if not is_success:
+            raise DvelopDMSPyException(f"{response.status_code}: {response.reason_phrase} --> {response.text}")
+        return response
+
+    def _next_url(self, jsresp: Dict):
+        next_link = jsresp.get("_links", {}).get("next")
+        if next_link is None:
+            return None
+        return f"{self.host_url}{next_link['href']}"
+
+    async def _do(self, http_method: str, endpoint: str, ep_params: Dict = None, data: Dict = None,
+                  base_url: str = None, limit: int = None) -> Result:
+        if base_url is None:
+            base_url = self.url
+
+        params = dict(ep_params) if ep_params is not None else {}
+        params["apiKey"] = self.api_key
+        headers = self._build_headers(http_method)
+
+        started = time.perf_counter()
+        response = await self._request(http_method=http_method, url=base_url + endpoint, headers=headers,
+                                       params=params, json=data)
+        data_out = None
+        try:
+            jsresp = response.json()
+            if "items" in jsresp.keys():
+                data_out = jsresp.get("items")
+            else:
+                data_out = jsresp
+
+            next_url = self._next_url(jsresp) if "_links" in jsresp.keys() else None
+            pages = 1
+            while next_url is not None and (limit is None or len(data_out) < limit):
+                page = (await self._request(http_method='GET', url=next_url, headers=headers)).json()
+                data_out.extend(page['items'])
+                next_url = self._next_url(page)
+                pages += 1
+            if pages > 1 and self.instrumentation.enabled:
+                self._emit(EVENT_PAGES, started, method=http_method, endpoint_class=endpoint_class(base_url + endpoint),
+                           url=base_url + endpoint, pages=pages, items=len(data_out))
+            if limit is not None and type(data_out) is list:
+                del data_out[limit:]
+        except (ValueError, JSONDecodeError):
+            pass
+
+        return Result(response.status_code, message=response.reason_phrase, data=data_out,
+                      headers=response.headers)
+
+    async def iter_pages(self, endpoint: str, ep_params: Dict = None,
+                         base_url: str = None) -> AsyncIterator[List[Dict]]:
+        if base_url is None:
+            base_url = self.url
+
+        params = dict(ep_params) if ep_params is not None else {}
+        params["apiKey"] = self.api_key
+        headers = self._build_headers('GET')
+        url = base_url + endpoint
+
+        started = time.perf_counter()
+        first_url = url
+        pages = 0
+        items = 0
+        error = None
+        try:
+            while url is not None:
+                response = await self._request(http_method='GET', url=url, headers=headers, params=params)
+                try:
+                    jsresp = response.json()
+                except (ValueError, JSONDecodeError) as e:
+                    raise DvelopDMSPyException(f"Bad JSON in response --> {response.text}") from e
+                pages += 1
+                if "items" in jsresp:
+                    page = jsresp.get("items")
+                else:
+                    page = [jsresp]
+                items += len(page)
+                yield page
+                url = self._next_url(jsresp)
+                params = None
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.instrumentation.enabled:
+                self._emit(EVENT_PAGES, started, method='GET', endpoint_class=endpoint_class(first_url),
+                           url=first_url, pages=pages, items=items, error=error)
+
+    async def iter_blob(self, url: str, offset: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        max_resume_attempts: int = 3, if_range: str = None,
+                        blob_info: dict = None) -> AsyncIterator[bytes]:
+        # Entspricht RestAdapter.iter_blob: blockweise, mit Fortsetzung per Range-Request und If-Range
+        started = time.perf_counter()
+        progress = [offset, 0]
+        error = None
+        try:
+            async for chunk in self._iter_blob(url, offset, chunk_size, max_resume_attempts, progress, if_range,
+                                               blob_info):
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.instrumentation.enabled:
+                self._emit(EVENT_BLOB_DOWNLOAD, started, method='GET', endpoint_class=endpoint_class(url), url=url,
+                           bytes_in=progress[0] - offset, retries=progress[1], error=error)
+
+    async def _iter_blob(self, url: str, offset: int, chunk_size: int, max_resume_attempts: int,
+                         progress: List[int], if_range: str = None, blob_info: dict = None) -> AsyncIterator[bytes]:
+        # progress: Liste [empfangene Bytes inkl. offset, Fortsetzungsversuche]
+        received = offset
+        validator = if_range
+        expected = None
+        attempts = 0
+        while True:
+            progress[0] = received
+            progress[1] = attempts
+            headers = self._build_headers('GET', binary=True)
+            # Ohne Kompression beziehen sich Range und Content-Length auf dieselben Bytes wie received
+            headers['Accept-Encoding'] = 'identity'
+            if received > 0:
+                headers['Range'] = f'bytes={received}-'
+                if validator is not None:
+                    headers['If-Range'] = validator
+            self._logger.debug(msg=f"method=GET, url={url}, offset={received}")
+            await self._throttle()
+            try:
+                async with self._semaphore, self._client.stream('GET', url, headers=headers,
+                                                                params={"apiKey": self.api_key}) as response:
+                    self._record_status(response.status_code, response.headers)
+                    if response.status_code == 416:
+                        total = parse_content_range_total(response.headers.get('Content-Range'))
+                        if total is not None and total == received:
+                            return
+                    if not 200 <= response.status_code <= 299:
+                        await response.aread()
+                        raise DvelopDMSPyException(f"{response.status_code}: {response.reason_phrase} --> "
+                                                   f"{response.text}")
+                    first = validator is None
+                    validator = check_blob_validator(validator, response.headers, response.status_code, received)
+                    if first and blob_info is not None:
+                        blob_info["validator"] = validator
+
+                    skip = 0
+                    if response.status_code == 206:
+                        expected = parse_content_range_total(response.headers.get('Content-Range'))
+                    else:
+                        skip = received
+                        content_length = response.headers.get('Content-Length')
+                        if content_length is not None and 'Content-Encoding' not in response.headers:
+                            expected = int(content_length)
+
+                    async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+                        if skip:
+                            if len(chunk) <= skip:
+                                skip -= len(chunk)
+                                continue
+                            chunk = chunk[skip:]
+                            skip = 0
+                        received += len(chunk)
+                        progress[0] = received
+                        yield chunk
+            except httpx.HTTPError as e:
+                self._logger.debug(msg=(str(e)))
+                attempts += 1
+                if attempts > max_resume_attempts:
+                    raise DvelopDMSPyException("Blob download failed") from e
+                continue
+
+            if expected is not None and received < expected and attempts < max_resume_attempts:
+                attempts += 1
+                continue
+            if expected is not None and received != expected:
+                raise DvelopDMSPyException(f"Blob size mismatch: expected {expected} bytes, received {received}")
+            return
+
+    async def upload_blob(self, chunks, max_chunk_retries: int = 3) -> str:
+        # chunks: asynchroner Iterator über Bytes. Ablauf wie RestAdapter.upload_blob
+        url = f"{self.url}blob/chunk/"
+        started = time.perf_counter()
+        location = None
+        chunk_count = 0
+        bytes_out = 0
+        error = None
+        try:
+            async for chunk in chunks:
+                location = await self._upload_chunk(url, chunk, max_chunk_retries)
+                url = f"{self.host_url}{location}"
+                chunk_count += 1
+                bytes_out += len(chunk)
+            if not chunk_count:
+                location = await self._upload_chunk(url, b"", max_chunk_retries)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.instrumentation.enabled:
+                self._emit(EVENT_BLOB_UPLOAD, started, method='POST', endpoint_class=endpoint_class(url), url=url,
+                           bytes_out=bytes_out, items=chunk_count, error=error)
+        return location
+
+    async def _upload_chunk(self, url: str, chunk: bytes, max_chunk_retries: int) -> str:
+        headers = self._build_headers('POST')
+        headers['Content-Type'] = 'application/octet-stream'
+        attempts = 0
+        while True:
+            try:
+                self._logger.debug(msg=f"method=POST, url={url}, size={len(chunk)}")
+                response = await self._send(http_method='POST', url=url, headers=headers,
+                                            params={"apiKey": self.api_key}, content=chunk)
+            except httpx.HTTPError as e:
+                self._logger.debug(msg=(str(e)))
+                if attempts >= max_chunk_retries:
+                    raise DvelopDMSPyException("Blob upload failed") from e
+                await asyncio.sleep(self.retry_policy.backoff(attempts))
+                attempts += 1
+                continue
+
+            if 200 <= response.status_code <= 299:
+                if "location" not in response.headers:
+                    raise DvelopDMSPyException("BLOB upload failed. No blob location detected")
+                return response.headers["location"]
+            if (response.status_code < 500 and response.status_code != 429) or attempts >= max_chunk_retries:
+                raise DvelopDMSPyException(f"{response.status_code}: {response.reason_phrase} --> {response.text}")
+            await asyncio.sleep(self.retry_policy.backoff(attempts,
+                                                          parse_retry_after(response.headers.get('Retry-After'))))
+            attempts += 1
@@ -0,0 +1,125 @@
+import io
+import json
+import os
+from typing import BinaryIO, Iterable, Iterator, Mapping, Optional, Union
+
+from dvelopdmspy.exceptions import BlobChangedException
+from dvelopdmspy.snapshot import write_json_atomic
+
+# Blöcke von 1 MiB halten den Speicherbedarf bei großen Dateien konstant
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobReader(io.RawIOBase):
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+        self._exhausted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer and not self._exhausted:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                self._exhausted = True
+        if not self._buffer:
+            return 0
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            close_chunks = getattr(self._chunks, "close", None)
+            if close_chunks is not None:
+                close_chunks()
+        super().close()
+
+
+def parse_content_range_total(content_range: Optional[str]) -> Optional[int]:
+    # "bytes 100-199/200" oder "bytes */200"
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1].strip()
+    if not total.isdigit():
+        return None
+    return int(total)
+
+
+def blob_validator(headers: Mapping[str, str]) -> Optional[str]:
+    # Wert für If-Range: ein starkes ETag, sonst Last-Modified. Schwache ETags sind für If-Range nicht zulässig
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def check_blob_validator(validator: Optional[str], headers: Mapping[str, str], status_code: int,
+                         received: int) -> Optional[str]:
+    # Liefert den Validator, gegen den weitere Fortsetzungen geprüft werden. Passt die Antwort bei einer
+    # Fortsetzung nicht dazu, hat sich der Blob geändert und die bisher geladenen Bytes sind unbrauchbar
+    current = blob_validator(headers)
+    if validator is None:
+        return current
+    if received > 0 and status_code == 200 and current != validator:
+        raise BlobChangedException("Blob changed on the server, download has to restart")
+    if current is not None and current != validator:
+        raise BlobChangedException("Blob changed on the server, download has to restart")
+    return validator
+
+
+def _part_meta_file(part_file: str) -> str:
+    return f"{part_file}.meta"
+
+
+def read_part_validator(part_file: str, url: str) -> Optional[str]:
+    # Validator des Blobs, zu dem die .part-Datei gehört. None, wenn sie nicht sicher fortgesetzt werden kann
+    try:
+        with open(_part_meta_file(part_file), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict) or meta.get("url") != url:
+        return None
+    return meta.get("validator")
+
+
+def write_part_validator(part_file: str, url: str, validator: Optional[str]):
+    write_json_atomic(_part_meta_file(part_file), {"url": url, "validator": validator})
+
+
+def remove_part_validator(part_file: str):
+    try:
+        os.remove(_part_meta_file(part_file))
+    except FileNotFoundError:
+        pass
+
+
+def iter_chunks(source: Union[str, os.PathLike, BinaryIO, Iterable[bytes]],
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    # Akzeptiert einen Dateipfad, ein Dateiobjekt oder einen Iterator über Bytes
+    # und liefert Blöcke mit höchstens chunk_size Bytes
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_chunks(f, chunk_size)
+        return
+
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    buffer = bytearray()
+    for piece in source:
+        buffer.extend(piece)
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
@@ -0,0 +1,182 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+ENDPOINT_REPOSITORIES = "repositories"
+ENDPOINT_MAPPINGS = "mappings"
+ENDPOINT_SEARCH = "srm"
+ENDPOINT_DOCUMENT = "o2m"
+ENDPOINT_USERS = "users"
+ENDPOINT_BLOB = "blob"
+ENDPOINT_OTHER = "other"
+
+# Gültigkeitsdauer in Sekunden je Endpunkt-Klasse. 0 bedeutet: nicht cachen
+DEFAULT_TTL = {
+    ENDPOINT_REPOSITORIES: 10800,
+    ENDPOINT_MAPPINGS: 10800,
+    ENDPOINT_SEARCH: 60,
+    ENDPOINT_DOCUMENT: 300,
+    ENDPOINT_USERS: 3600,
+    ENDPOINT_BLOB: 0,
+    ENDPOINT_OTHER: 0,
+}
+
+_DOC_ID_PATTERN = re.compile(r"/(?:o2m|o)/([^/?]+)")
+
+
+def endpoint_class(url: str) -> str:
+    path = urlsplit(url).path.rstrip("/")
+    if path.endswith("/dms/r"):
+        return ENDPOINT_REPOSITORIES
+    if path.endswith("/source"):
+        return ENDPOINT_MAPPINGS
+    if path.endswith("/srm"):
+        return ENDPOINT_SEARCH
+    if "/blob/" in path or path.endswith("/blob") or "/b/" in path:
+        return ENDPOINT_BLOB
+    if "/o2m" in path:
+        return ENDPOINT_DOCUMENT
+    if "scim/Users" in path:
+        return ENDPOINT_USERS
+    return ENDPOINT_OTHER
+
+
+def document_id_from_url(url: str) -> Optional[str]:
+    match = _DOC_ID_PATTERN.search(urlsplit(url).path)
+    if match is None:
+        return None
+    return match.group(1)
+
+
+class CacheEntry:
+    __slots__ = ("status_code", "reason", "headers", "content", "encoding", "url", "endpoint_class", "doc_id",
+                 "expires")
+
+    def __init__(self, response: requests.Response, endpoint_cls: str, doc_id: Optional[str], expires: float):
+        self.status_code = response.status_code
+        self.reason = response.reason
+        self.headers = dict(response.headers)
+        self.content = response.content
+        self.encoding = response.encoding
+        self.url = response.url
+        self.endpoint_class = endpoint_cls
+        self.doc_id = doc_id
+        self.expires = expires
+
+    def to_response(self) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.reason = self.reason
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response.encoding = self.encoding
+        response.url = self.url
+        return response
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024, ttl: Dict[str, float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = dict(DEFAULT_TTL)
+        if ttl is not None:
+            self.ttl.update(ttl)
+        self._entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Wird bei jeder Invalidierung erhöht. Eine Antwort wird nur gespeichert, wenn seit Beginn ihrer
+        # Anfrage nichts invalidiert wurde, sonst könnte sie den Stand vor einer Änderung enthalten
+        self.generation = 0
+
+    @staticmethod
+    def make_key(url: str, params: Dict = None, accept: str = None) -> Tuple:
+        if params:
+            t_params = tuple(sorted((str(k), str(v)) for k, v in params.items() if k != "apiKey"))
+        else:
+            t_params = ()
+        return url, t_params, accept
+
+    def is_cacheable(self, url: str) -> bool:
+        return bool(self.ttl.get(endpoint_class(url), 0))
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Tuple) -> Optional[requests.Response]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.to_response()
+
+    def set(self, key: Tuple, response: requests.Response, generation: int = None):
+        # generation: Wert von self.generation vor dem Senden der Anfrage
+        url = key[0]
+        endpoint_cls = endpoint_class(url)
+        ttl = self.ttl.get(endpoint_cls, 0)
+        if not ttl or not 200 <= response.status_code <= 299:
+            return
+        entry_size = len(response.content or b"")
+        if entry_size > self.max_bytes:
+            return
+        entry = CacheEntry(response, endpoint_cls, document_id_from_url(url), time.monotonic() + ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += entry_size
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def invalidate_document(self, doc_id: str):
+        # Geänderte Dokumente können auch in Suchergebnissen auftauchen, daher werden diese mit verworfen
+        with self._lock:
+            self.generation += 1
+            for key in [k for k, e in self._entries.items()
+                        if e.endpoint_class == ENDPOINT_SEARCH or (doc_id is not None and e.doc_id == doc_id)]:
+                self._remove(key)
+
+    def invalidate_class(self, endpoint_cls: str):
+        with self._lock:
+            self.generation += 1
+            for key in [k for k, e in self._entries.items() if e.endpoint_class == endpoint_cls]:
+                self._remove(key)
+
+    def invalidate_url(self, url: str):
+        endpoint_cls = endpoint_class(url)
+        if endpoint_cls in (ENDPOINT_DOCUMENT, ENDPOINT_SEARCH):
+            self.invalidate_document(document_id_from_url(url))
+        elif endpoint_cls != ENDPOINT_BLOB:
+            self.invalidate_class(endpoint_cls)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.content or b"")
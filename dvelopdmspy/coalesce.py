@@ -0,0 +1,71 @@
+import threading
+from typing import Callable, Dict, Hashable, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class _Flight:
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def copy_response(response: requests.Response) -> requests.Response:
+    # Jeder Aufrufer bekommt ein eigenes Response-Objekt, der bereits gelesene Inhalt wird geteilt
+    copied = requests.Response()
+    copied.status_code = response.status_code
+    copied.reason = response.reason
+    copied.headers = CaseInsensitiveDict(response.headers)
+    copied._content = response.content
+    copied.encoding = response.encoding
+    copied.url = response.url
+    return copied
+
+
+class SingleFlight:
+    # Gleiche, gleichzeitig laufende Anfragen werden nur einmal an den Server geschickt.
+    # Weitere Aufrufer warten auf das Ergebnis des ersten und erhalten eine Kopie der Antwort
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], requests.Response]) -> Tuple[requests.Response, bool]:
+        # Liefert die Antwort und ob dieser Aufruf die Anfrage selbst ausgeführt hat
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy_response(flight.response), False
+
+        try:
+            flight.response = func()
+            # Inhalt vollständig lesen, solange nur dieser Thread die Antwort kennt
+            _ = flight.response.content
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.response, True
+
+    def forget_all(self):
+        # Nach schreibenden Zugriffen dürfen neue Leser sich nicht an ältere, noch laufende Anfragen hängen
+        with self._lock:
+            self._flights.clear()
@@ -0,0 +1,85 @@
+import sys
+from functools import lru_cache
+from typing import Iterable
+
+import humps
+
+from dvelopdmspy.models import DmsDocument, Links, SourceProperty
+
+# Feste Zuordnung der bekannten camelCase-Felder zu den Attributnamen der Modelle.
+# Damit entfällt das rekursive humps.decamelize über den gesamten Dokumentenbaum.
+LINK_KEYS = {
+    "self": "links_self",
+    "previewReadonly": "preview_readonly",
+    "deleteWithReason": "delete_with_reason",
+    "mainblobcontent": "mainblobcontent",
+    "pdfblobcontent": "pdfblobcontent",
+    "updateWithContent": "update_with_content",
+    "update": "update",
+    "linkDmsObject": "link_dms_object",
+    "versions": "versions",
+    "displayVersion": "display_version",
+    "notes": "notes",
+}
+
+SOURCE_PROPERTY_KEYS = {
+    "key": "key",
+    "value": "value",
+    "values": "values",
+    "isMultiValue": "is_multi_value",
+    "displayValue": "display_value",
+}
+
+
+@lru_cache(maxsize=1024)
+def _decamelize_key(key: str) -> str:
+    # Nur für unbekannte Schlüssel, das Ergebnis wird zwischengespeichert
+    return humps.decamelize(key)
+
+
+def decode_links(links_dict: dict) -> Links:
+    link_kwargs = {}
+    for name, link in links_dict.items():
+        attr = LINK_KEYS.get(name)
+        if attr is None:
+            attr = _decamelize_key(name)
+        link_kwargs[attr] = link
+    return Links(**link_kwargs)
+
+
+def decode_source_property(prop_dict: dict) -> SourceProperty:
+    prop_kwargs = {}
+    for name, value in prop_dict.items():
+        attr = SOURCE_PROPERTY_KEYS.get(name)
+        if attr is None:
+            attr = _decamelize_key(name)
+        prop_kwargs[attr] = value
+    # Eigenschaftsschlüssel wiederholen sich in jedem Dokument und werden nur einmal gehalten
+    key = prop_kwargs.get("key")
+    if type(key) is str:
+        prop_kwargs["key"] = sys.intern(key)
+    return SourceProperty(**prop_kwargs)
+
+
+class Projection:
+    # Auswahl beim Dekodieren: nur die genannten Eigenschaftsschlüssel, _links nur bei links=True.
+    # Alle übrigen Eigenschaften werden übersprungen, ohne SourceProperty-Objekte anzulegen
+    __slots__ = ("keys", "links")
+
+    def __init__(self, keys: Iterable[str], links: bool = False):
+        self.keys = frozenset(keys)
+        self.links = links
+
+
+def decode_document(doc_dict: dict, projection: Projection = None) -> DmsDocument:
+    links = doc_dict.get("_links")
+    source_properties = doc_dict.get("sourceProperties", [])
+    if projection is not None:
+        keys = projection.keys
+        source_properties = [p for p in source_properties if p.get("key") in keys]
+        if not projection.links:
+            links = None
+    return DmsDocument(links=decode_links(links) if links is not None else None,
+                       id_=doc_dict.get("id"),
+                       source_properties=[decode_source_property(p) for p in source_properties],
+                       source_categories=doc_dict.get("sourceCategories"))
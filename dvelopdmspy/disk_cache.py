@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+KIND_DOCUMENT = "document"
+KIND_MAPPINGS = "mappings"
+KIND_USERS = "users"
+
+# Gültigkeitsdauer in Sekunden je Art. Ältere Einträge werden nur nach erneuter Prüfung verwendet
+DEFAULT_DISK_TTL = {
+    KIND_DOCUMENT: 300,
+    KIND_MAPPINGS: 10800,
+    KIND_USERS: 3600,
+}
+
+LAST_ALTERATION_KEY = "property_last_alteration_date"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    scope TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_alteration TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (scope, kind, resource)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+
+def raw_last_alteration(doc_dict: Dict) -> Optional[str]:
+    # Zeitstempel direkt aus der Antwort lesen, ohne das Dokument zu dekodieren
+    for prop in doc_dict.get("sourceProperties") or ():
+        if prop.get("key") == LAST_ALTERATION_KEY:
+            return prop.get("value")
+    return None
+
+
+class DiskCache:
+    # Persistenter Cache für Dokumente (o2m), Mappings und Benutzer in einer SQLite-Datenbank.
+    # Mehrere Prozesse können dieselbe Datei gleichzeitig nutzen (WAL-Modus). Jeder Thread erhält
+    # eine eigene Verbindung. Überschreitet der Inhalt max_bytes, werden die am längsten nicht
+    # gelesenen Einträge entfernt. scope trennt Hosts und Repositories, z.B. "host/repository".
+    # Fehler der Datenbank (z.B. gesperrt) werden protokolliert: Lesen gilt dann als Fehltreffer,
+    # Schreiben und Abgleichen entfallen
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, ttl: Dict[str, float] = None,
+                 busy_timeout: float = 10.0, logger: logging.Logger = None):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.ttl = dict(DEFAULT_DISK_TTL)
+        if ttl:
+            self.ttl.update(ttl)
+        self.busy_timeout = busy_timeout
+        self._logger = logger or logging.getLogger(__name__)
+        # Verbindung je Thread. Verbindungen beendeter Threads werden beim Öffnen der nächsten geschlossen
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._puts = 0
+        self._lock = threading.Lock()
+        try:
+            self._connect().executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            self._log_error("create schema", e)
+
+    def _connect(self) -> sqlite3.Connection:
+        thread = threading.current_thread()
+        conn = self._connections.get(thread)
+        if conn is None:
+            # check_same_thread=False, damit close() und das Aufräumen auch Verbindungen anderer Threads
+            # schließen können. Benutzt wird jede Verbindung nur von ihrem eigenen Thread
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            with self._lock:
+                for dead in [t for t in self._connections if not t.is_alive()]:
+                    self._connections.pop(dead).close()
+                self._connections[thread] = conn
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _log_error(self, action: str, error: sqlite3.Error):
+        self._logger.warning(msg=f"disk cache {self.path}: {action} failed: {error}")
+
+    def close(self):
+        # Schließt die Verbindungen aller Threads. Danach öffnet jeder Zugriff eine neue Verbindung
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+
+    def get(self, scope: str, kind: str, resource: str, max_age: float = None) -> Optional[bytes]:
+        # Liefert den Inhalt, solange er jünger als max_age (Standard: ttl der Art) ist
+        if max_age is None:
+            max_age = self.ttl.get(kind, 0)
+        try:
+            return self._get(scope, kind, resource, max_age)
+        except sqlite3.Error as e:
+            self._log_error(f"read of {kind} {resource}", e)
+            return None
+
+    def _get(self, scope: str, kind: str, resource: str, max_age: float) -> Optional[bytes]:
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT body, stored_at, accessed_at FROM entries "
+                           "WHERE scope = ? AND kind = ? AND resource = ?",
+                           (scope, kind, resource)).fetchone()
+        if row is None:
+            return None
+        body, stored_at, accessed_at = row
+        if now - stored_at > max_age:
+            return None
+        # Zugriffszeit nur grob nachführen, damit Lesen nicht ständig schreibt
+        if now - accessed_at > 60:
+            try:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE scope = ? AND kind = ? AND resource = ?",
+                             (now, scope, kind, resource))
+            except sqlite3.Error as e:
+                # Der gelesene Inhalt bleibt gültig, nur die Zugriffszeit fehlt für die Verdrängung
+                self._log_error(f"access time update of {kind} {resource}", e)
+        return body
+
+    def get_json(self, scope: str, kind: str, resource: str, max_age: float = None):
+        body = self.get(scope, kind, resource, max_age=max_age)
+        if body is None:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            self.invalidate(scope, kind, resource)
+            return None
+
+    def put(self, scope: str, kind: str, resource: str, body: bytes, last_alteration: str = None):
+        now = time.time()
+        try:
+            self._connect().execute("INSERT OR REPLACE INTO entries "
+                                    "(scope, kind, resource, body, size, last_alteration, stored_at, accessed_at) "
+                                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (scope, kind, resource, body, len(body), last_alteration, now, now))
+        except sqlite3.Error as e:
+            self._log_error(f"write of {kind} {resource}", e)
+            return
+        with self._lock:
+            self._puts += 1
+            check = self._puts % 64 == 0
+        if check:
+            self.evict()
+
+    def put_json(self, scope: str, kind: str, resource: str, data, last_alteration: str = None):
+        self.put(scope, kind, resource, json.dumps(data, separators=(",", ":")).encode(), last_alteration)
+
+    def put_document(self, scope: str, doc_dict: Dict):
+        self.put_json(scope, KIND_DOCUMENT, doc_dict.get("id"), doc_dict, raw_last_alteration(doc_dict))
+
+    def revalidate_documents(self, scope: str, doc_dicts: Iterable[Dict]):
+        # Dokumente aus Rechercheergebnissen gleichen vorhandene Einträge ab: bei unverändertem
+        # Änderungszeitpunkt gilt der Eintrag wieder als frisch, sonst wird er ersetzt.
+        # Nicht zwischengespeicherte Dokumente werden nicht aufgenommen. Geschrieben (und damit die
+        # Datenbank gesperrt) wird nur, wenn mindestens ein Treffer im Cache liegt
+        found = {}
+        for doc_dict in doc_dicts:
+            doc_id = doc_dict.get("id")
+            last_alteration = raw_last_alteration(doc_dict)
+            if doc_id is not None and last_alteration is not None:
+                found[doc_id] = (doc_dict, last_alteration)
+        if not found:
+            return
+        try:
+            self._revalidate_documents(scope, found)
+        except sqlite3.Error as e:
+            self._log_error("revalidation of search hits", e)
+
+    def _revalidate_documents(self, scope: str, found: Dict):
+        conn = self._connect()
+        cached = {}
+        doc_ids = list(found)
+        # Höchstens 500 Parameter je Abfrage, ältere SQLite-Versionen erlauben nicht mehr als 999
+        for i in range(0, len(doc_ids), 500):
+            batch = doc_ids[i:i + 500]
+            placeholders = ", ".join("?" * len(batch))
+            cached.update(conn.execute(f"SELECT resource, last_alteration FROM entries WHERE scope = ? AND kind = ? "
+                                       f"AND resource IN ({placeholders})", (scope, KIND_DOCUMENT, *batch)))
+        if not cached:
+            return
+
+        now = time.time()
+        refreshed = []
+        replaced = []
+        for doc_id, cached_alteration in cached.items():
+            doc_dict, last_alteration = found[doc_id]
+            if cached_alteration == last_alteration:
+                refreshed.append((now, scope, KIND_DOCUMENT, doc_id, last_alteration))
+            else:
+                body = json.dumps(doc_dict, separators=(",", ":")).encode()
+                replaced.append((body, len(body), last_alteration, now, scope, KIND_DOCUMENT, doc_id))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Die Bedingung auf last_alteration verhindert, dass ein inzwischen ersetzter Eintrag als frisch gilt
+            conn.executemany("UPDATE entries SET stored_at = ? WHERE scope = ? AND kind = ? AND resource = ? "
+                             "AND last_alteration = ?", refreshed)
+            conn.executemany("UPDATE entries SET body = ?, size = ?, last_alteration = ?, stored_at = ? "
+                             "WHERE scope = ? AND kind = ? AND resource = ?", replaced)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidate(self, scope: str, kind: str, resource: str = None):
+        # Ohne resource werden alle Einträge dieser Art entfernt
+        try:
+            if resource is None:
+                self._connect().execute("DELETE FROM entries WHERE scope = ? AND kind = ?", (scope, kind))
+            else:
+                self._connect().execute("DELETE FROM entries WHERE scope = ? AND kind = ? AND resource = ?",
+                                        (scope, kind, resource))
+        except sqlite3.Error as e:
+            self._log_error(f"invalidation of {kind} {resource or ''}".rstrip(), e)
+
+    def invalidate_document(self, scope: str, doc_id: str):
+        self.invalidate(scope, KIND_DOCUMENT, doc_id)
+
+    def evict(self):
+        # Am längsten nicht gelesene Einträge entfernen, bis der Inhalt unter 90 % von max_bytes liegt
+        try:
+            self._evict()
+        except sqlite3.Error as e:
+            self._log_error("eviction", e)
+
+    def _evict(self):
+        conn = self._connect()
+        total = conn.execute("SELECT total(size) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - self.max_bytes * 0.9
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            freed = 0
+            doomed = []
+            for scope, kind, resource, size in conn.execute(
+                    "SELECT scope, kind, resource, size FROM entries ORDER BY accessed_at"):
+                doomed.append((scope, kind, resource))
+                freed += size
+                if freed >= target:
+                    break
+            conn.executemany("DELETE FROM entries WHERE scope = ? AND kind = ? AND resource = ?", doomed)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        try:
+            self._connect().execute("DELETE FROM entries")
+        except sqlite3.Error as e:
+            self._log_error("clear", e)
+
+    def __len__(self):
+        return self._connect().execute("SELECT count(*) FROM entries").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        return int(self._connect().execute("SELECT total(size) FROM entries").fetchone()[0])
@@ -1,20 +1,35 @@
+import contextlib
+import io
 import json
 import logging
 import os
+import queue
+import threading
 import humps
 
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import time
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+from dvelopdmspy.blob import BlobReader, DEFAULT_CHUNK_SIZE, iter_chunks, read_part_validator, \
+    remove_part_validator, write_part_validator
+from dvelopdmspy.cache import ENDPOINT_MAPPINGS, ResponseCache
+from dvelopdmspy.decoder import Projection, decode_document
+from dvelopdmspy.disk_cache import DiskCache, KIND_DOCUMENT, KIND_MAPPINGS, KIND_USERS
 from dvelopdmspy.rest_adapter import RestAdapter
-from dvelopdmspy.exceptions import DvelopDMSPyException
-from dvelopdmspy.models import DmsDocument, Mappings, DmsUser, Category
+from dvelopdmspy.shard import Shard, category_shards
+from dvelopdmspy.snapshot import load_snapshot, save_snapshot
+from dvelopdmspy.throttle import RetryPolicy
+from dvelopdmspy.exceptions import BlobChangedException, DvelopDMSPyException, UnknownMappingException
+from dvelopdmspy.metrics import EVENT_DECODE, Event, Instrumentation
+from dvelopdmspy.models import DmsDocument, Mappings, DmsUser, Category, ArchiveJob, BulkResult, Result
 
+# Größte Seitengröße, die bei Recherchen angefordert wird
+MAX_PAGE_SIZE = 1000
 
-def sanitize_doc(doc_dict) -> DmsDocument:
-    doc = dict(humps.decamelize(doc_dict))
-    doc["id_"] = doc.pop("id")
-    doc["links"] = doc.pop("_links")
-    t_doc = DmsDocument(**doc)
-    return t_doc
+
+def sanitize_doc(doc_dict, projection: Projection = None) -> DmsDocument:
+    return decode_document(doc_dict, projection)
 
 
 def sanitize_user(user_dict) -> DmsUser:
@@ -33,27 +48,49 @@ def sanitize_user(user_dict) -> DmsUser:
     return t_user
 
 
-class DvelopDmsPy:
-    def __init__(self, hostname: str, api_key: str, repository: str = None,
-                 logger: logging.Logger = None, user_agent: str = "DvelopDmsPy/1.0"):
-        self._rest_adapter = RestAdapter(hostname, api_key, repository, logger, user_agent)
-        self._source_mappings = self.get_mappings()
+class DvelopDmsBase:
+    # Gemeinsame Hilfsfunktionen für DvelopDmsPy und AsyncDvelopDmsPy, die keine Anfragen an den Server stellen
+    _source_mappings: Mappings
+    default_page_size: int = None
 
-    def get_mappings(self) -> Mappings:
-        t_result = self._rest_adapter.get(endpoint='source')
-        t_result.data = dict(humps.decamelize(t_result.data))
-        t_result.data["id_"] = t_result.data.pop("id")
-        return Mappings(**t_result.data)
+    @property
+    def instrumentation(self) -> Instrumentation:
+        return self._rest_adapter.instrumentation
+
+    def _decode_docs(self, items: List[dict], projection: Projection = None) -> List[DmsDocument]:
+        instrumentation = self._rest_adapter.instrumentation
+        if not instrumentation.enabled:
+            return [sanitize_doc(doc, projection) for doc in items]
+        started = time.perf_counter()
+        docs = [sanitize_doc(doc, projection) for doc in items]
+        instrumentation.emit(Event(EVENT_DECODE, duration=time.perf_counter() - started, items=len(docs)))
+        return docs
 
     def _get_property_key_from_name(self, property_name: str) -> str:
-        for prop in self._source_mappings.properties:
-            if prop.display_name.lower() == property_name.lower():
-                return str(prop.key)
+        key = self._source_mappings.property_key(property_name)
+        if key is None:
+            raise UnknownMappingException(f"Unknown property '{property_name}' in source "
+                                          f"'{self._source_mappings.display_name}'")
+        return key
+
+    def _projection(self, select: Iterable[str] = None, select_links: bool = False) -> Projection:
+        # select: Anzeigenamen oder Schlüssel der benötigten Eigenschaften. None = alle Eigenschaften und Links
+        if select is None:
+            return None
+        keys = []
+        for name in select:
+            if name.startswith("property_") or self._source_mappings.display_name_of(name) is not None:
+                keys.append(name)
+            else:
+                keys.append(self._get_property_key_from_name(name))
+        return Projection(keys, links=select_links)
 
     def _get_category_key_from_name(self, category_name: str) -> str:
-        for cat in self._source_mappings.categories:
-            if cat.display_name.lower() == category_name.lower():
-                return str(cat.key)
+        key = self._source_mappings.category_key(category_name)
+        if key is None:
+            raise UnknownMappingException(f"Unknown category '{category_name}' in source "
+                                          f"'{self._source_mappings.display_name}'")
+        return key
 
     def add_property(self, display_name: str, pvalue, prop_guid: str = None, pdict: dict = None) -> dict:
         if pdict is None:
@@ -92,7 +129,72 @@ class DvelopDmsPy:
         plist.append(t_key)
         return plist
 
-    def update_properties(self, doc_id: str, properties: list, alteration_msg: str = None, state_change: bool = True):
+    def _page_size(self, limit: int = None, page_size: int = None):
+        # Bei kleinem Limit nur so viele Treffer anfordern, wie tatsächlich benötigt werden
+        if page_size is None:
+            page_size = self.default_page_size
+        if limit is not None and (page_size is None or limit < page_size):
+            page_size = limit
+        if page_size is not None:
+            page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        return page_size
+
+    def _search_params(self, properties: dict = None, categories: list = None, fulltext: str = None,
+                       page_size: int = None, sort_property: str = None, ascending: bool = True) -> dict:
+        params = {
+            "sourceid": f"/dms/r/{self._rest_adapter.repository}/source"
+        }
+        if properties is not None:
+            params["sourceproperties"] = json.dumps(properties)
+
+        if categories is not None:
+            params["sourcecategories"] = json.dumps(categories)
+
+        if fulltext:
+            params["fulltext"] = fulltext
+
+        if page_size is not None:
+            params["pagesize"] = page_size
+
+        if sort_property is not None:
+            params["sourcesortproperty"] = sort_property
+            params["ascending"] = "true" if ascending else "false"
+        return params
+
+    @staticmethod
+    def _unique_ids(doc_ids: Iterable[str]) -> List[str]:
+        # Doppelte und leere IDs entfernen, Reihenfolge beibehalten
+        return list(dict.fromkeys(str(doc_id) for doc_id in doc_ids if doc_id))
+
+    @staticmethod
+    def _id_batches(doc_ids: List[str], batch_size: int) -> List[List[str]]:
+        batch_size = max(1, min(batch_size, MAX_PAGE_SIZE))
+        return [doc_ids[i:i + batch_size] for i in range(0, len(doc_ids), batch_size)]
+
+    def _id_search_params(self, batch: List[str]) -> dict:
+        # Mehrere Werte einer Eigenschaft werden in der Recherche ODER-verknüpft
+        return self._search_params(properties={"property_document_id": batch}, page_size=len(batch))
+
+    @staticmethod
+    def _by_ids_result(doc_ids: List[str], found: Dict[str, DmsDocument]) -> Tuple[Dict[str, DmsDocument], List[str]]:
+        ret_docs = {}
+        missing = []
+        for doc_id in doc_ids:
+            doc = found.get(doc_id)
+            if doc is None:
+                missing.append(doc_id)
+            else:
+                ret_docs[doc_id] = doc
+        return ret_docs, missing
+
+    @staticmethod
+    def _mappings_from_data(data: dict) -> Mappings:
+        data = dict(humps.decamelize(data))
+        data["id_"] = data.pop("id")
+        return Mappings(**data)
+
+    def _update_request(self, doc_id: str, properties: list, alteration_msg: str = None,
+                        state_change: bool = True) -> tuple:
         if not alteration_msg:
             alteration_msg = "Ohne Kommentar"
 
@@ -106,27 +208,288 @@ class DvelopDmsPy:
         update_doc_endpoint = f"o2m/{doc_id}"
         if state_change:
             update_doc_endpoint = f"{update_doc_endpoint}/v/current"
+        return update_doc_endpoint, post_body
+
+    @staticmethod
+    def _archive_filename(filepath, filename: str = None) -> str:
+        # filepath kann auch ein Dateiobjekt oder ein Iterator über Bytes sein, dann wird filename benötigt
+        if filename is not None:
+            return filename
+        if isinstance(filepath, (str, os.PathLike)):
+            return os.path.basename(filepath)
+        if isinstance(getattr(filepath, "name", None), str):
+            return os.path.basename(filepath.name)
+        raise DvelopDMSPyException("filename is required when archiving from a stream")
+
+    def _archive_request(self, filename: str, category_id: str, properties: list, blob_location: str,
+                         doc_id: str = None, alteration_msg: str = None) -> tuple:
+        blob_to_doc_endpoint = "o2m"
+        if doc_id is not None:
+            blob_to_doc_endpoint = f"{blob_to_doc_endpoint}/{doc_id}"
+            if alteration_msg is None or len(alteration_msg) == 0:
+                alteration_msg = "dvelopdmspy: New version"
+        else:
+            alteration_msg = None
+
+        release_property = {
+            'key': 'property_state',
+            'values': [
+                'Release'
+            ]
+        }
+        # Kopie, damit die Liste des Aufrufers nicht verändert wird
+        properties = list(properties)
+        properties.append(release_property)
+
+        post_body = {
+            'filename': filename,
+            'sourceCategory': category_id,
+            'sourceId': f'/dms/r/{self._rest_adapter.repository}/source',
+            'contentLocationUri': blob_location,
+            'sourceProperties': {
+                'properties': properties
+            }
+        }
+
+        if alteration_msg is not None:
+            post_body["alterationText"] = alteration_msg
+            return 'PUT', blob_to_doc_endpoint, post_body
+        return 'POST', blob_to_doc_endpoint, post_body
+
+    @staticmethod
+    def _doc_id_from_location(location: str) -> str:
+        try:
+            return location.split('?')[0].split('/')[-1]
+        except (KeyError, ValueError, AttributeError):
+            return "unknown"
+
+    def get_categories(self) -> List[Category]:
+        return self._source_mappings.categories
+
+    def key_to_display_name(self, key) -> str:
+        if type(key) is list:
+            for tk in key:
+                if len(tk) > 10:
+                    key = tk
+                    break
+        display_name = self._source_mappings.display_name_of(key)
+        if display_name is None:
+            return ""
+        return display_name
+
+    @staticmethod
+    def _blob_file_name(doc: DmsDocument, name_template: str) -> str:
+        ext = ""
+        if doc.filename:
+            ext = os.path.splitext(doc.filename)[1]
+        elif doc.filetype:
+            ext = f".{doc.filetype}"
+        fields = {
+            "id_": doc.id_,
+            "ext": ext,
+            "filename": doc.filename,
+            "caption": doc.caption,
+            "category": doc.category,
+            "category_display": doc.category_display,
+        }
+        # Werte dürfen keine Pfadtrenner enthalten, damit nicht außerhalb von dest_dir geschrieben wird
+        fields = {k: str(v or "").replace("/", "_").replace("\\", "_") for k, v in fields.items()}
+        return name_template.format(**fields)
+
+    def get_property_value(self, doc_obj: DmsDocument, prop_display_name: str):
+        prop_key = self._get_property_key_from_name(prop_display_name)
+        prop = doc_obj.get_source_property(prop_key)
+        if prop is not None:
+            if prop.values is None:
+                return prop.value
+            else:
+                return prop.values
+
+    def get_property_value2(self, doc_obj: DmsDocument, prop_display_name: str = None, prop_guid: str = None) -> dict:
+        ret_dict = {}
+        if prop_guid is None:
+            prop_guid = self._get_property_key_from_name(prop_display_name)
+        prop = doc_obj.get_source_property(prop_guid)
+        if prop is not None:
+            if prop.values is not None:
+                ret_dict["values"] = prop.values
+            if prop.value is not None:
+                ret_dict["value"] = prop.value
+            if prop.display_value is not None:
+                ret_dict["display_value"] = prop.display_value
+        return ret_dict
+
+
+class DvelopDmsPy(DvelopDmsBase):
+    def __init__(self, hostname: str, api_key: str, repository: str = None,
+                 logger: logging.Logger = None, user_agent: str = "DvelopDmsPy/1.0",
+                 pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, use_cache: bool = True, cache: ResponseCache = None,
+                 prefetch_pages: int = 0, default_page_size: int = None, scheme: str = "https",
+                 rate_limit: float = None, max_retries: int = 3, mappings_snapshot: str = None,
+                 revalidate_snapshot: bool = True, coalesce_requests: bool = True,
+                 hooks: Iterable[Callable[[Event], None]] = None, disk_cache: DiskCache = None,
+                 timeout: float = 60.0):
+        # Repository und Mappings werden erst beim ersten Bedarf vom Server geladen.
+        # mappings_snapshot: Datei, in der die Mappings zwischen Programmläufen gespeichert werden. Ist sie
+        # vorhanden, startet der Client ohne Anfrage; mit revalidate_snapshot wird sie im Hintergrund geprüft
+        self._snapshot_path = mappings_snapshot
+        self._revalidate_snapshot = revalidate_snapshot
+        self._snapshot = None
+        if mappings_snapshot is not None:
+            self._snapshot = load_snapshot(mappings_snapshot, hostname, repository)
+            if repository is None and self._snapshot is not None:
+                repository = self._snapshot.get("repository")
+        self._mappings = None
+        self._mappings_lock = threading.Lock()
+        # disk_cache: gemeinsamer Cache auf der Platte für Dokumente, Mappings und Benutzer, auch
+        # zwischen mehreren Prozessen. Schreibende Aufrufe dieses Clients entfernen betroffene Einträge
+        self._disk_cache = disk_cache
+        self._rest_adapter = RestAdapter(hostname, api_key, repository, logger, user_agent,
+                                         pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                         pool_block=pool_block, keep_alive=keep_alive,
+                                         use_cache=use_cache, cache=cache, prefetch_pages=prefetch_pages,
+                                         scheme=scheme, rate_limit=rate_limit,
+                                         retry_policy=RetryPolicy(max_retries=max_retries),
+                                         coalesce_requests=coalesce_requests, hooks=hooks, timeout=timeout)
+        # Seitengröße für Recherchen ohne Limit. None = Vorgabe des Servers
+        self.default_page_size = default_page_size
+
+    @property
+    def _source_mappings(self) -> Mappings:
+        mappings = self._mappings
+        if mappings is None:
+            with self._mappings_lock:
+                if self._mappings is None:
+                    self._mappings = self._load_mappings()
+                mappings = self._mappings
+        return mappings
+
+    @_source_mappings.setter
+    def _source_mappings(self, mappings: Mappings):
+        self._mappings = mappings
+
+    def _disk_scope(self, per_repository: bool = True) -> str:
+        # Benutzer gelten für den ganzen Host, alles andere je Repository
+        if per_repository:
+            return f"{self._rest_adapter.host_base}/{self._rest_adapter.repository}"
+        return self._rest_adapter.host_base
+
+    def _revalidate_disk(self, items: List[dict]):
+        if self._disk_cache is not None and items:
+            self._disk_cache.revalidate_documents(self._disk_scope(), items)
+
+    def _load_mappings(self) -> Mappings:
+        snapshot, self._snapshot = self._snapshot, None
+        if snapshot is None:
+            if self._disk_cache is not None:
+                data = self._disk_cache.get_json(self._disk_scope(), KIND_MAPPINGS, "source")
+                if data is not None:
+                    return self._mappings_from_data(data)
+            return self._fetch_mappings()
+        if self._revalidate_snapshot:
+            threading.Thread(target=self._revalidate_mappings, args=(snapshot,), name="dvelopdmspy-mappings",
+                             daemon=True).start()
+        return self._mappings_from_data(snapshot["data"])
+
+    def _fetch_mappings(self) -> Mappings:
+        t_result = self._rest_adapter.get(endpoint='source')
+        self._write_snapshot(t_result)
+        if self._disk_cache is not None:
+            self._disk_cache.put_json(self._disk_scope(), KIND_MAPPINGS, "source", t_result.data)
+        return self._mappings_from_data(t_result.data)
+
+    def _revalidate_mappings(self, snapshot: dict):
+        try:
+            t_result = self._rest_adapter.revalidate('source', etag=snapshot.get("etag"),
+                                                     last_modified=snapshot.get("last_modified"))
+        except DvelopDMSPyException:
+            # Der Snapshot bleibt in Gebrauch und wird beim nächsten Start erneut geprüft
+            return
+        if t_result is None:
+            return
+        if t_result.data != snapshot["data"]:
+            self._source_mappings = self._mappings_from_data(t_result.data)
+        self._write_snapshot(t_result)
+        if self._disk_cache is not None:
+            self._disk_cache.put_json(self._disk_scope(), KIND_MAPPINGS, "source", t_result.data)
+
+    def _write_snapshot(self, t_result: Result):
+        if self._snapshot_path is None:
+            return
+        headers = t_result.headers or {}
+        try:
+            save_snapshot(self._snapshot_path, self._rest_adapter.host_base, self._rest_adapter.repository,
+                          t_result.data, etag=headers.get("ETag"), last_modified=headers.get("Last-Modified"))
+        except OSError:
+            # Ohne Snapshot funktioniert der Client weiterhin, nur der nächste Start ist langsamer
+            pass
+
+    def close(self):
+        self._rest_adapter.close()
+
+    def clear_cache(self):
+        if self._rest_adapter.cache is not None:
+            self._rest_adapter.cache.clear()
+        if self._disk_cache is not None:
+            self._disk_cache.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_mappings(self) -> Mappings:
+        t_result = self._rest_adapter.get(endpoint='source')
+        return self._mappings_from_data(t_result.data)
+
+    def refresh_mappings(self) -> Mappings:
+        # Neue Mappings samt Indizes vollständig laden und erst dann austauschen
+        if self._rest_adapter.cache is not None:
+            self._rest_adapter.cache.invalidate_class(ENDPOINT_MAPPINGS)
+        if self._disk_cache is not None:
+            self._disk_cache.invalidate(self._disk_scope(), KIND_MAPPINGS)
+        mappings = self._fetch_mappings()
+        self._source_mappings = mappings
+        return mappings
+
+    def update_properties(self, doc_id: str, properties: list, alteration_msg: str = None, state_change: bool = True):
+        update_doc_endpoint, post_body = self._update_request(doc_id, properties, alteration_msg=alteration_msg,
+                                                              state_change=state_change)
+        self._invalidate_disk_document(doc_id)
         result = self._rest_adapter.put(endpoint=update_doc_endpoint, data=post_body)
         if result.status_code > 299:
             raise DvelopDMSPyException(result.message)
         return True
 
+    def _invalidate_disk_document(self, doc_id: str):
+        # Vor dem Schreiben entfernen, damit auch ein fehlgeschlagener Aufruf keinen veralteten Eintrag hinterlässt
+        if self._disk_cache is not None and doc_id is not None:
+            self._disk_cache.invalidate_document(self._disk_scope(), str(doc_id))
+
     def set_state_editor(self, doc_id: str, editor_id: str = None, state_string: str = None,
-                         alteration_msg: str = None):
+                         alteration_msg: str = None, doc: DmsDocument = None):
         if not editor_id and not state_string:
             return True
-        try:
+
+        # Das Dokument wird nur gelesen, wenn ein Wert fehlt und es nicht bereits übergeben wurde
+        if not editor_id or not state_string:
             the_doc: DmsDocument
-            the_doc = self.get_documents(doc_id=doc_id)[0]
-        except (TypeError, IndexError) as e:
-            raise DvelopDMSPyException(str(e))
-
-        if not editor_id:
-            # Wenn kein Editor genannt wurde, soll der aktuelle beibehalten werden
-            editor_id = the_doc.editor
-        if not state_string:
-            # Wenn kein State genannt wurde, soll der aktuelle beibehalten werden
-            state_string = the_doc.state
+            if doc is not None:
+                the_doc = doc
+            else:
+                try:
+                    the_doc = self.get_documents(doc_id=doc_id)[0]
+                except (TypeError, IndexError) as e:
+                    raise DvelopDMSPyException(str(e))
+
+            if not editor_id:
+                # Wenn kein Editor genannt wurde, soll der aktuelle beibehalten werden
+                editor_id = the_doc.editor
+            if not state_string:
+                # Wenn kein State genannt wurde, soll der aktuelle beibehalten werden
+                state_string = the_doc.state
         if not alteration_msg:
             alteration_msg = "changed state and/or editor by script"
 
@@ -134,6 +497,38 @@ class DvelopDmsPy:
         props = self.add_upload_property(display_name="", pvalue=state_string, prop_guid="property_state", plist=props)
         return self.update_properties(doc_id=doc_id, properties=props, alteration_msg=alteration_msg)
 
+    def update_properties_many(self, updates: Union[Dict[str, list], Iterable[tuple]], alteration_msg: str = None,
+                               state_change: bool = True, max_workers: int = 4) -> List[BulkResult]:
+        # updates: {doc_id: properties} oder Tupel (doc_id, properties[, alteration_msg])
+        if isinstance(updates, dict):
+            updates = updates.items()
+        t_updates = [tuple(update) for update in updates]
+
+        def update(item: tuple) -> BulkResult:
+            t_doc_id, properties = item[0], item[1]
+            t_msg = item[2] if len(item) > 2 else alteration_msg
+            self.update_properties(t_doc_id, properties, alteration_msg=t_msg, state_change=state_change)
+            return BulkResult(item, doc_id=t_doc_id)
+
+        return self._run_bulk(update, t_updates, max_workers, doc_id_of=lambda item: str(item[0]))
+
+    def set_state_editor_many(self, docs: Iterable[Union[DmsDocument, str]], editor_id: str = None,
+                              state_string: str = None, alteration_msg: str = None,
+                              max_workers: int = 4) -> List[BulkResult]:
+        # Werden DmsDocument-Objekte übergeben oder sind editor_id und state_string beide gesetzt,
+        # entfällt das Lesen des Dokumentes vor dem Schreiben
+        def set_state(item) -> BulkResult:
+            if isinstance(item, DmsDocument):
+                t_doc_id, t_doc = item.id_, item
+            else:
+                t_doc_id, t_doc = str(item), None
+            self.set_state_editor(t_doc_id, editor_id=editor_id, state_string=state_string,
+                                  alteration_msg=alteration_msg, doc=t_doc)
+            return BulkResult(item, doc_id=t_doc_id)
+
+        return self._run_bulk(set_state, list(docs), max_workers,
+                              doc_id_of=lambda item: item.id_ if isinstance(item, DmsDocument) else str(item))
+
     def delete_document(self,
                         doc_id: str = None,
                         delete_reason: str = None):
@@ -141,130 +536,333 @@ class DvelopDmsPy:
         data = {
             "reason": delete_reason
         }
+        self._invalidate_disk_document(doc_id)
         self._rest_adapter.delete(endpoint=endpoint, ep_params=None, data=data)
         return True
 
     def archive_file(self,
-                     filepath: str,
+                     filepath: Union[str, os.PathLike, BinaryIO, Iterable[bytes]],
                      category_id: str,
                      properties: list[dict],
                      doc_id: str = None,
-                     alteration_msg: str = None) -> str | bool:
-        # Blob Upload
-        blob_endpoint = "blob/chunk/"
-        result = self._rest_adapter.post(endpoint=blob_endpoint, binary_upload=True, upload_file_path=filepath)
-        if result.status_code != 201 or "location" not in result.headers:
-            raise DvelopDMSPyException("BLOB upload failed. No blob location detected")
-        blob_location = result.headers["location"]
-
-        # Archivdokument erstellen und mit Blob verbinden
-        blob_to_doc_endpoint = "o2m"
-        if doc_id is not None:
-            blob_to_doc_endpoint = f"{blob_to_doc_endpoint}/{doc_id}"
-            if alteration_msg is None or len(alteration_msg) == 0:
-                alteration_msg = "dvelopdmspy: New version"
-        else:
-            alteration_msg = None
-
-        release_property = {
-            'key': 'property_state',
-            'values': [
-                'Release'
-            ]
-        }
-        properties.append(release_property)
+                     alteration_msg: str = None,
+                     filename: str = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     max_chunk_retries: int = 3) -> str | bool:
+        filename = self._archive_filename(filepath, filename)
 
-        post_body = {
-            'filename': os.path.basename(filepath),
-            'sourceCategory': category_id,
-            'sourceId': f'/dms/r/{self._rest_adapter.repository}/source',
-            'contentLocationUri': blob_location,
-            'sourceProperties': {
-                'properties': properties
-            }
-        }
+        # Blob Upload in Blöcken
+        try:
+            blob_location = self._rest_adapter.upload_blob(iter_chunks(filepath, chunk_size),
+                                                           max_chunk_retries=max_chunk_retries)
+        except IOError as e:
+            raise DvelopDMSPyException("Blob upload failed") from e
 
-        if alteration_msg is not None:
-            post_body["alterationText"] = alteration_msg
+        # Archivdokument erstellen und mit Blob verbinden
+        http_method, blob_to_doc_endpoint, post_body = self._archive_request(filename, category_id, properties,
+                                                                             blob_location, doc_id=doc_id,
+                                                                             alteration_msg=alteration_msg)
+        if http_method == 'PUT':
+            self._invalidate_disk_document(doc_id)
             result = self._rest_adapter.put(endpoint=blob_to_doc_endpoint, data=post_body)
         else:
             result = self._rest_adapter.post(endpoint=blob_to_doc_endpoint, data=post_body)
         if result.status_code > 299:
             raise DvelopDMSPyException(result.message)
-        try:
-            t_loc = result.headers.get("Location")
-            t_doc_id = t_loc.split('?')[0].split('/')[-1]
-        except (KeyError, ValueError, AttributeError):
-            t_doc_id = "unknown"
+        return self._doc_id_from_location(result.headers.get("Location"))
+
+    @staticmethod
+    def _run_bulk(func, items: list, max_workers: int, doc_id_of: Callable[[object], str] = None) -> List[BulkResult]:
+        # Führt func für jedes Element im Thread-Pool aus. Fehler werden je Element im Ergebnis
+        # festgehalten und brechen den Stapel nicht ab. Die Reihenfolge entspricht der Eingabe.
+        # doc_id_of: liefert die Dokument-ID eines Elements für das Ergebnis im Fehlerfall
+        def run(item) -> BulkResult:
+            try:
+                return func(item)
+            except Exception as e:
+                if doc_id_of is not None:
+                    t_doc_id = doc_id_of(item)
+                else:
+                    t_doc_id = item if isinstance(item, str) else None
+                return BulkResult(item, doc_id=t_doc_id, error=e)
 
-        return t_doc_id
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="dvelopdmspy-bulk") as executor:
+            return list(executor.map(run, items))
+
+    def archive_many(self, jobs: Iterable[Union[ArchiveJob, tuple]], max_workers: int = 4,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, max_chunk_retries: int = 3) -> List[BulkResult]:
+        # jobs: ArchiveJob-Objekte oder Tupel (filepath, category_id, properties[, doc_id])
+        # max_workers begrenzt die Anzahl gleichzeitiger Uploads, pool_maxsize sollte mindestens so groß sein
+        t_jobs = [job if isinstance(job, ArchiveJob) else ArchiveJob(*job) for job in jobs]
+
+        def archive(job: ArchiveJob) -> BulkResult:
+            t_doc_id = self.archive_file(job.filepath, job.category_id, job.properties, doc_id=job.doc_id,
+                                         alteration_msg=job.alteration_msg, filename=job.filename,
+                                         chunk_size=chunk_size, max_chunk_retries=max_chunk_retries)
+            return BulkResult(job, doc_id=t_doc_id)
+
+        return self._run_bulk(archive, t_jobs, max_workers, doc_id_of=lambda job: job.doc_id)
 
     def get_documents(self,
                       properties: dict = None,
                       categories: list = None,
                       limit: int = None,
                       doc_id: str = None,
-                      fulltext: str = None) -> List[DmsDocument]:
+                      fulltext: str = None,
+                      page_size: int = None,
+                      shards: Union[str, List[Shard]] = None,
+                      max_workers: int = 4,
+                      select: List[str] = None,
+                      select_links: bool = False) -> List[DmsDocument]:
+        # shards: "category" oder eine Liste von Shard (z.B. date_shards(...)), siehe iter_documents_sharded
+        # select: nur diese Eigenschaften (Anzeigename oder Schlüssel) dekodieren, _links nur mit select_links
+        if shards is not None and doc_id is None:
+            return list(self.iter_documents_sharded(properties=properties, categories=categories, fulltext=fulltext,
+                                                    shards=shards, limit=limit, max_workers=max_workers,
+                                                    page_size=page_size, select=select, select_links=select_links))
+        projection = self._projection(select, select_links)
         ret_docs = []
-        params = {
-            "sourceid": f"/dms/r/{self._rest_adapter.repository}/source"
-        }
-        if properties is not None:
-            params["sourceproperties"] = json.dumps(properties)
-
-        if categories is not None:
-            params["sourcecategories"] = json.dumps(categories)
-
-        if fulltext:
-            params["fulltext"] = fulltext
 
         # Wurde eine doc_id angegeben, brauchen wir keinen Recherche
         if doc_id is not None:
+            if self._disk_cache is not None:
+                return [self._get_document_via_disk(str(doc_id), projection)]
             endpoint = f"o2m/{doc_id}"
+            params = self._search_params(properties=properties, categories=categories, fulltext=fulltext)
         else:
             endpoint = "srm"
+            params = self._search_params(properties=properties, categories=categories, fulltext=fulltext,
+                                         page_size=self._page_size(limit, page_size))
 
         result = self._rest_adapter.get(endpoint=endpoint, ep_params=params, limit=limit)
         if type(result.data) is list:
-            for doc in result.data:
-                t_doc = sanitize_doc(doc)
-                ret_docs.append(t_doc)
+            self._revalidate_disk(result.data)
+            ret_docs.extend(self._decode_docs(result.data, projection))
         else:
-            t_doc = sanitize_doc(result.data)
-            ret_docs.append(t_doc)
+            ret_docs.extend(self._decode_docs([result.data], projection))
 
         return ret_docs
 
+    def _get_document_via_disk(self, doc_id: str, projection: Projection = None) -> DmsDocument:
+        scope = self._disk_scope()
+        doc_dict = self._disk_cache.get_json(scope, KIND_DOCUMENT, doc_id)
+        if doc_dict is None:
+            result = self._rest_adapter.get(endpoint=f"o2m/{doc_id}", ep_params=self._search_params())
+            doc_dict = result.data
+            self._disk_cache.put_document(scope, doc_dict)
+        return self._decode_docs([doc_dict], projection)[0]
+
+    def iter_documents(self,
+                       properties: dict = None,
+                       categories: list = None,
+                       limit: int = None,
+                       fulltext: str = None,
+                       prefetch: int = None,
+                       page_size: int = None,
+                       select: List[str] = None,
+                       select_links: bool = False) -> Iterator[DmsDocument]:
+        # Wie get_documents, die Treffer werden aber seitenweise abgerufen und einzeln geliefert,
+        # ohne das gesamte Suchergebnis im Speicher zu halten
+        if limit is not None and limit <= 0:
+            return
+        projection = self._projection(select, select_links)
+        params = self._search_params(properties=properties, categories=categories, fulltext=fulltext,
+                                     page_size=self._page_size(limit, page_size))
+        doc_count = 0
+        for page in self._rest_adapter.iter_pages(endpoint="srm", ep_params=params, prefetch=prefetch):
+            if limit is not None:
+                page = page[:limit - doc_count]
+            self._revalidate_disk(page)
+            for doc in self._decode_docs(page, projection):
+                yield doc
+                doc_count += 1
+                if limit is not None and doc_count >= limit:
+                    return
+
+    def iter_document_pages(self,
+                            properties: dict = None,
+                            categories: list = None,
+                            fulltext: str = None,
+                            prefetch: int = None,
+                            page_size: int = None,
+                            sort_property: str = None,
+                            ascending: bool = True,
+                            select: List[str] = None,
+                            select_links: bool = False) -> Iterator[List[DmsDocument]]:
+        # Liefert die Treffer seitenweise als Listen, optional sortiert nach sort_property (Eigenschaftsschlüssel)
+        params = self._search_params(properties=properties, categories=categories, fulltext=fulltext,
+                                     page_size=self._page_size(None, page_size), sort_property=sort_property,
+                                     ascending=ascending)
+        projection = self._projection(select, select_links)
+        for page in self._rest_adapter.iter_pages(endpoint="srm", ep_params=params, prefetch=prefetch):
+            self._revalidate_disk(page)
+            yield self._decode_docs(page, projection)
+
+    def _resolve_shards(self, shards: Union[str, List[Shard]], categories: list = None) -> List[Shard]:
+        if shards == "category":
+            return category_shards(categories if categories is not None
+                                   else [category.key for category in self.get_categories()])
+        if isinstance(shards, str):
+            raise DvelopDMSPyException(f"Unknown shard mode '{shards}'")
+        return list(shards)
+
+    def iter_documents_sharded(self,
+                               properties: dict = None,
+                               categories: list = None,
+                               fulltext: str = None,
+                               shards: Union[str, List[Shard]] = "category",
+                               limit: int = None,
+                               max_workers: int = 4,
+                               page_size: int = None,
+                               select: List[str] = None,
+                               select_links: bool = False) -> Iterator[DmsDocument]:
+        # Teilt die Recherche in unabhängige Teilrecherchen, deren Seiten parallel abgerufen werden.
+        # Die Treffer kommen in der Reihenfolge ihres Eintreffens, jedes Dokument nur einmal.
+        # pool_maxsize sollte mindestens max_workers betragen
+        if limit is not None and limit <= 0:
+            return
+        t_shards = self._resolve_shards(shards, categories)
+        if not t_shards:
+            return
+        projection = self._projection(select, select_links)
+        params_list = []
+        for shard in t_shards:
+            t_properties, t_categories = shard.apply(properties, categories)
+            params_list.append(self._search_params(properties=t_properties, categories=t_categories,
+                                                   fulltext=fulltext, page_size=self._page_size(None, page_size)))
+
+        # Begrenzte Warteschlange, damit schnelle Teilrecherchen nicht beliebig vorauslaufen
+        pages = queue.Queue(maxsize=2 * max(1, max_workers))
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def run(params: dict):
+            try:
+                for page in self._rest_adapter.iter_pages(endpoint="srm", ep_params=params):
+                    if not put(page):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        seen = set()
+        doc_count = 0
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(params_list))),
+                                      thread_name_prefix="dvelopdmspy-shard")
+        try:
+            for params in params_list:
+                executor.submit(run, params)
+            remaining = len(params_list)
+            while remaining:
+                item = pages.get()
+                if item is done:
+                    remaining -= 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                # Nur bisher ungesehene Treffer dekodieren
+                new_items = []
+                for doc_dict in item:
+                    t_id = doc_dict.get("id")
+                    if t_id not in seen:
+                        seen.add(t_id)
+                        new_items.append(doc_dict)
+                if limit is not None:
+                    new_items = new_items[:limit - doc_count]
+                self._revalidate_disk(new_items)
+                for doc in self._decode_docs(new_items, projection):
+                    yield doc
+                    doc_count += 1
+                    if limit is not None and doc_count >= limit:
+                        return
+        finally:
+            stop.set()
+            executor.shutdown(wait=True)
+
+    def get_documents_by_ids(self, doc_ids: Iterable[str], batch_size: int = 100, max_workers: int = 4,
+                             use_search: bool = True, select: List[str] = None,
+                             select_links: bool = False) -> Tuple[Dict[str, DmsDocument], List[str]]:
+        # Liefert (id -> Dokument, fehlende IDs). Die IDs werden in Stapeln von batch_size per Recherche
+        # aufgelöst, schlägt eine Recherche fehl oder ist use_search False, einzeln über o2m.
+        # Dokumente, die nicht gelesen werden können, werden als fehlend gemeldet.
+        t_ids = self._unique_ids(doc_ids)
+        found = {}
+        lock = threading.Lock()
+        projection = self._projection(select, select_links)
+        t_all_ids = t_ids
+        if self._disk_cache is not None:
+            # Frische Einträge aus dem Cache auf der Platte, nur der Rest wird angefragt
+            scope = self._disk_scope()
+            cached = {}
+            for doc_id in t_ids:
+                doc_dict = self._disk_cache.get_json(scope, KIND_DOCUMENT, doc_id)
+                if doc_dict is not None:
+                    cached[doc_id] = doc_dict
+            if cached:
+                found.update(zip(cached, self._decode_docs(list(cached.values()), projection)))
+                t_ids = [doc_id for doc_id in t_ids if doc_id not in cached]
+
+        def by_id(doc_id: str):
+            try:
+                t_docs = self.get_documents(doc_id=doc_id, select=select, select_links=select_links)
+            except DvelopDMSPyException:
+                return
+            if t_docs:
+                with lock:
+                    found[doc_id] = t_docs[0]
+
+        def by_search(batch: List[str]):
+            try:
+                result = self._rest_adapter.get(endpoint="srm", ep_params=self._id_search_params(batch))
+            except DvelopDMSPyException:
+                for doc_id in batch:
+                    by_id(doc_id)
+                return
+            wanted = set(batch)
+            if self._disk_cache is not None:
+                scope = self._disk_scope()
+                for doc_dict in result.data:
+                    if doc_dict.get("id") in wanted:
+                        self._disk_cache.put_document(scope, doc_dict)
+            for t_doc in self._decode_docs(result.data, projection):
+                if t_doc.id_ in wanted:
+                    with lock:
+                        found[t_doc.id_] = t_doc
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="dvelopdmspy-ids") as executor:
+            if use_search:
+                list(executor.map(by_search, self._id_batches(t_ids, batch_size)))
+            else:
+                list(executor.map(by_id, t_ids))
+        return self._by_ids_result(t_all_ids, found)
+
     def get_users(self) -> List[DmsUser]:
         ret_users = []
         endpoint = "scim/Users"
-        result = self._rest_adapter.get_identity(endpoint=endpoint)
-        resources = result.data.get("resources")
+        data = None
+        if self._disk_cache is not None:
+            data = self._disk_cache.get_json(self._disk_scope(per_repository=False), KIND_USERS, endpoint)
+        if data is None:
+            data = self._rest_adapter.get_identity(endpoint=endpoint).data
+            if self._disk_cache is not None:
+                self._disk_cache.put_json(self._disk_scope(per_repository=False), KIND_USERS, endpoint, data)
+        resources = data.get("resources")
         for entry in resources:
             t_user = sanitize_user(entry)
             ret_users.append(t_user)
         return ret_users
 
-    def get_categories(self) -> List[Category]:
-        return self._source_mappings.categories
-
-    def key_to_display_name(self, key) -> str:
-        if type(key) is list:
-            for tk in key:
-                if len(tk) > 10:
-                    key = tk
-                    break
-        for prop in self._source_mappings.properties:
-            if str(prop.key) == key:
-                return prop.display_name
-
-        for cat in self._source_mappings.categories:
-            if str(cat.key) == key:
-                return cat.display_name
-
-        return ""
-
-    def download_doc_blob(self, doc_id: str, dest_file: str, dl_href: str = None) -> bool:
+    def _blob_url(self, doc_id: str, dl_href: str = None) -> str:
         # Wurde die Funktion aus einem Dokument heraus aufgerufen, kennen wir den Pfad zum Blob bereits
         if dl_href is None:
             t_docs = self.get_documents(doc_id=doc_id)
@@ -272,35 +870,141 @@ class DvelopDmsPy:
                 raise DvelopDMSPyException("Document not found.")
             t_doc = t_docs[0]
             dl_href = t_doc.links.mainblobcontent
-
-        host_base = f"https://{self._rest_adapter.host_base}"
-        result = self._rest_adapter.get(endpoint=dl_href, base_url=host_base, binary=True)
-
-        with open(dest_file, 'wb') as out_file:
-            out_file.write(result.raw.content)
-
+        return f"{self._rest_adapter.host_url}{dl_href}"
+
+    def iter_doc_blob(self, doc_id: str, dl_href: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      max_resume_attempts: int = 3) -> Iterator[bytes]:
+        url = self._blob_url(doc_id, dl_href)
+        return self._rest_adapter.iter_blob(url, chunk_size=chunk_size, max_resume_attempts=max_resume_attempts)
+
+    def open_doc_blob(self, doc_id: str, dl_href: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      max_resume_attempts: int = 3) -> BinaryIO:
+        chunks = self.iter_doc_blob(doc_id, dl_href=dl_href, chunk_size=chunk_size,
+                                    max_resume_attempts=max_resume_attempts)
+        return io.BufferedReader(BlobReader(chunks), buffer_size=chunk_size)
+
+    def download_doc_blob(self, doc_id: str, dest_file: str, dl_href: str = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = True,
+                          max_resume_attempts: int = 3) -> bool:
+        url = self._blob_url(doc_id, dl_href)
+        self._download_to_file(url, dest_file, chunk_size=chunk_size, resume=resume,
+                               max_resume_attempts=max_resume_attempts)
         return True
 
-    def get_property_value(self, doc_obj: DmsDocument, prop_display_name: str):
-        prop_key = self._get_property_key_from_name(prop_display_name)
-        for prop in doc_obj.source_properties:
-            if prop.key == prop_key:
-                if prop.values is None:
-                    return prop.value
-                else:
-                    return prop.values
+    def _download_to_file(self, url: str, dest_file: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          resume: bool = True, max_resume_attempts: int = 3) -> int:
+        # Es wird zunächst in eine .part-Datei geschrieben. Existiert diese bereits von einem abgebrochenen
+        # Download desselben Blobs (gleiche URL, gespeicherter ETag/Last-Modified), wird ab deren Ende mit
+        # If-Range fortgesetzt. Hat sich der Blob inzwischen geändert, beginnt der Download von vorn.
+        part_file = f"{dest_file}.part"
+        offset = 0
+        if_range = None
+        if resume and os.path.exists(part_file):
+            if_range = read_part_validator(part_file, url)
+            if if_range is not None:
+                offset = os.path.getsize(part_file)
 
-    def get_property_value2(self, doc_obj: DmsDocument, prop_display_name: str = None, prop_guid: str = None) -> dict:
-        ret_dict = {}
-        if prop_guid is None:
-            prop_guid = self._get_property_key_from_name(prop_display_name)
-        for prop in doc_obj.source_properties:
-            if prop.key == prop_guid:
-                if prop.values is not None:
-                    ret_dict["values"] = prop.values
-                if prop.value is not None:
-                    ret_dict["value"] = prop.value
-                if prop.display_value is not None:
-                    ret_dict["display_value"] = prop.display_value
-                break
-        return ret_dict
+        try:
+            transferred = self._write_part_file(url, part_file, offset, if_range, chunk_size, max_resume_attempts)
+        except BlobChangedException:
+            if offset == 0:
+                raise
+            transferred = self._write_part_file(url, part_file, 0, None, chunk_size, max_resume_attempts)
+
+        os.replace(part_file, dest_file)
+        remove_part_validator(part_file)
+        return transferred
+
+    def _write_part_file(self, url: str, part_file: str, offset: int, if_range: str, chunk_size: int,
+                         max_resume_attempts: int) -> int:
+        transferred = 0
+        blob_info = {}
+        chunks = self._rest_adapter.iter_blob(url, offset=offset, chunk_size=chunk_size,
+                                              max_resume_attempts=max_resume_attempts, if_range=if_range,
+                                              blob_info=blob_info)
+        if offset == 0:
+            remove_part_validator(part_file)
+        with open(part_file, 'ab' if offset else 'wb') as out_file:
+            for chunk in chunks:
+                if offset == 0 and transferred == 0:
+                    # Vor den ersten Bytes festhalten, zu welchem Blob die .part-Datei gehört
+                    write_part_validator(part_file, url, blob_info.get("validator"))
+                out_file.write(chunk)
+                transferred += len(chunk)
+        return transferred
+
+    def download_many(self, docs: Iterable[Union[DmsDocument, str]], dest_dir: str,
+                      name_template: str = "{id_}{ext}", max_workers: int = 4, per_host_limit: int = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = True,
+                      max_resume_attempts: int = 3) -> List[BulkResult]:
+        # docs: DmsDocument-Objekte (der Blob-Link wird direkt verwendet) oder Dokument-IDs, doppelte werden
+        # nur einmal geladen. Ein Ergebnis je Dokument in der Reihenfolge des ersten Auftretens
+        # name_template: Platzhalter {id_}, {ext}, {filename}, {caption}, {category}, {category_display}
+        # per_host_limit begrenzt gleichzeitige Downloads je Host zusätzlich zu max_workers
+        os.makedirs(dest_dir, exist_ok=True)
+        host_limits = {}
+        host_limits_lock = threading.Lock()
+
+        def host_semaphore(url: str):
+            if not per_host_limit:
+                return contextlib.nullcontext()
+            host = urlsplit(url).netloc
+            with host_limits_lock:
+                if host not in host_limits:
+                    host_limits[host] = threading.BoundedSemaphore(per_host_limit)
+                return host_limits[host]
+
+        # Jedes Dokument nur einmal, sonst schreiben zwei Threads in dieselbe .part-Datei
+        t_items = []
+        seen = set()
+        for item in docs:
+            t_id = item.id_ if isinstance(item, DmsDocument) else str(item)
+            if t_id not in seen:
+                seen.add(t_id)
+                t_items.append(item)
+
+        def resolve(item) -> Union[DmsDocument, Exception]:
+            if isinstance(item, DmsDocument):
+                return item
+            try:
+                t_docs = self.get_documents(doc_id=str(item))
+                if len(t_docs) == 0:
+                    raise DvelopDMSPyException("Document not found.")
+            except Exception as e:
+                return e
+            return t_docs[0]
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="dvelopdmspy-bulk") as executor:
+            t_docs = list(executor.map(resolve, t_items))
+
+        # Zielpfade vor dem Start festlegen. Ergibt name_template für mehrere Dokumente denselben Pfad,
+        # wird nur das erste geladen und die übrigen als fehlgeschlagen gemeldet
+        results: List[BulkResult] = [None] * len(t_items)
+        jobs = []
+        targets = {}
+        for index, (item, doc) in enumerate(zip(t_items, t_docs)):
+            if isinstance(doc, Exception):
+                results[index] = BulkResult(item, doc_id=str(item), error=doc)
+                continue
+            dest_file = os.path.join(dest_dir, self._blob_file_name(doc, name_template))
+            owner = targets.setdefault(os.path.normcase(os.path.abspath(dest_file)), doc.id_)
+            if owner != doc.id_:
+                results[index] = BulkResult(item, doc_id=doc.id_, path=dest_file, error=DvelopDMSPyException(
+                    f"Target file {dest_file} is already used by document {owner}"))
+                continue
+            jobs.append((index, item, doc, dest_file))
+
+        def download(job: tuple) -> BulkResult:
+            index, item, doc, dest_file = job
+            try:
+                url = self._blob_url(doc.id_, doc.links.mainblobcontent)
+                with host_semaphore(url):
+                    transferred = self._download_to_file(url, dest_file, chunk_size=chunk_size, resume=resume,
+                                                         max_resume_attempts=max_resume_attempts)
+            except Exception as e:
+                return BulkResult(item, doc_id=doc.id_, error=e, path=dest_file)
+            return BulkResult(item, doc_id=doc.id_, bytes_transferred=transferred, path=dest_file)
+
+        for job, result in zip(jobs, self._run_bulk(download, jobs, max_workers, doc_id_of=lambda job: job[2].id_)):
+            results[job[0]] = result
+        return results
@@ -1,2 +1,12 @@
 class DvelopDMSPyException(Exception):
     pass
+
+
+class UnknownMappingException(DvelopDMSPyException):
+    # Anzeigename einer Eigenschaft oder Kategorie ist in den Mappings der Quelle nicht vorhanden
+    pass
+
+
+class BlobChangedException(DvelopDMSPyException):
+    # Der Blob wurde auf dem Server geändert, während er geladen wurde bzw. seit ein Download abgebrochen ist
+    pass
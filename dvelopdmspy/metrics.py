@@ -0,0 +1,201 @@
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Arten von Events:
+# request: eine HTTP-Anfrage samt Wiederholungen, ein Cache-Treffer oder eine geteilte Anfrage
+# pages: ein Abruf über mehrere Ergebnisseiten
+# blob_download/blob_upload: eine vollständige Übertragung eines Blobs
+# decode: Umwandlung einer Trefferseite in DmsDocument
+EVENT_REQUEST = "request"
+EVENT_PAGES = "pages"
+EVENT_BLOB_DOWNLOAD = "blob_download"
+EVENT_BLOB_UPLOAD = "blob_upload"
+EVENT_DECODE = "decode"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Event:
+    __slots__ = ("kind", "method", "endpoint_class", "url", "status_code", "bytes_in", "bytes_out", "duration",
+                 "retries", "cache_hit", "coalesced", "pages", "items", "error")
+
+    def __init__(self, kind: str, method: str = None, endpoint_class: str = None, url: str = None,
+                 status_code: int = None, bytes_in: int = 0, bytes_out: int = 0, duration: float = 0.0,
+                 retries: int = 0, cache_hit: Optional[bool] = None, coalesced: bool = False, pages: int = 0,
+                 items: int = 0, error: BaseException = None):
+        self.kind = kind
+        self.method = method
+        self.endpoint_class = endpoint_class
+        self.url = url
+        self.status_code = status_code
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+        self.duration = duration
+        self.retries = retries
+        # None: Anfrage war nicht cachebar bzw. kein Cache aktiv
+        self.cache_hit = cache_hit
+        self.coalesced = coalesced
+        self.pages = pages
+        self.items = items
+        self.error = error
+
+    def __repr__(self):
+        return f"Event({self.kind}, {self.method} {self.endpoint_class}, status={self.status_code}, " \
+               f"duration={self.duration * 1000:.1f}ms)"
+
+
+class Instrumentation:
+    # Hooks sind beliebige Callables, die jedes Event erhalten. Ein Fehler in einem Hook
+    # wird protokolliert und bricht die Anfrage nicht ab
+    def __init__(self, hooks: Iterable[Callable[[Event], None]] = None, logger=None):
+        self._hooks = tuple(hooks) if hooks is not None else ()
+        self._logger = logger
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._hooks)
+
+    def add(self, hook: Callable[[Event], None]):
+        self._hooks = self._hooks + (hook,)
+
+    def remove(self, hook: Callable[[Event], None]):
+        self._hooks = tuple(h for h in self._hooks if h is not hook)
+
+    def emit(self, event: Event):
+        for hook in self._hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                if self._logger is not None:
+                    self._logger.debug(msg=f"instrumentation hook {hook!r} failed: {e}")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # Ein zusätzlicher Zähler für Werte oberhalb der letzten Grenze
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        # Obergrenze des Buckets, in dem das Quantil liegt
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class _Series:
+    __slots__ = ("count", "errors", "statuses", "bytes_in", "bytes_out", "retries", "cache_hits", "cache_misses",
+                 "coalesced", "pages", "items", "latency")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.count = 0
+        self.errors = 0
+        self.statuses: Dict[int, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+        self.pages = 0
+        self.items = 0
+        self.latency = Histogram(buckets)
+
+
+class MetricsCollector:
+    # Sammelt Events im Prozess: Zähler und Latenz-Histogramme je (Art, Endpunkt-Klasse, Methode).
+    # Wird als Hook registriert: DvelopDmsPy(..., hooks=[collector])
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, str, str], _Series] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event):
+        key = (event.kind, event.endpoint_class or "", event.method or "")
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.buckets)
+            series.count += 1
+            if event.error is not None or (event.status_code is not None and event.status_code >= 400):
+                series.errors += 1
+            if event.status_code is not None:
+                series.statuses[event.status_code] = series.statuses.get(event.status_code, 0) + 1
+            series.bytes_in += event.bytes_in
+            series.bytes_out += event.bytes_out
+            series.retries += event.retries
+            if event.cache_hit is True:
+                series.cache_hits += 1
+            elif event.cache_hit is False:
+                series.cache_misses += 1
+            if event.coalesced:
+                series.coalesced += 1
+            series.pages += event.pages
+            series.items += event.items
+            series.latency.observe(event.duration)
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def snapshot(self) -> List[Dict]:
+        result = []
+        with self._lock:
+            for (kind, endpoint_cls, method), series in sorted(self._series.items()):
+                latency = series.latency
+                result.append({
+                    "kind": kind,
+                    "endpoint_class": endpoint_cls,
+                    "method": method,
+                    "count": series.count,
+                    "errors": series.errors,
+                    "statuses": dict(series.statuses),
+                    "bytes_in": series.bytes_in,
+                    "bytes_out": series.bytes_out,
+                    "retries": series.retries,
+                    "cache_hits": series.cache_hits,
+                    "cache_misses": series.cache_misses,
+                    "coalesced": series.coalesced,
+                    "pages": series.pages,
+                    "items": series.items,
+                    "latency_sum": latency.sum,
+                    "latency_p50": latency.quantile(0.5),
+                    "latency_p95": latency.quantile(0.95),
+                    "latency_p99": latency.quantile(0.99),
+                    "latency_buckets": dict(zip(latency.buckets + (float("inf"),), latency.counts)),
+                })
+        return result
+
+    def render_prometheus(self, prefix: str = "dvelopdmspy") -> str:
+        # Textformat für Prometheus, z.B. für einen eigenen /metrics-Endpunkt
+        lines = []
+        counters = ("count", "errors", "bytes_in", "bytes_out", "retries", "cache_hits", "cache_misses", "coalesced",
+                    "pages", "items")
+        for entry in self.snapshot():
+            labels = f'kind="{entry["kind"]}",endpoint="{entry["endpoint_class"]}",method="{entry["method"]}"'
+            for name in counters:
+                lines.append(f"{prefix}_{name}_total{{{labels}}} {entry[name]}")
+            cumulative = 0
+            for bound, bucket_count in entry["latency_buckets"].items():
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{prefix}_latency_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{prefix}_latency_seconds_sum{{{labels}}} {entry['latency_sum']}")
+            lines.append(f"{prefix}_latency_seconds_count{{{labels}}} {entry['count']}")
+        return "\n".join(lines) + "\n"
@@ -32,7 +32,16 @@ class Result:
         self.headers = headers
 
 
+def _href(link: Optional[Dict]) -> Optional[str]:
+    if link is None:
+        return None
+    return link.get("href")
+
+
 class Links:
+    __slots__ = ("links_self", "preview_readonly", "delete_with_reason", "mainblobcontent", "pdfblobcontent",
+                 "update_with_content", "update", "link_dms_object", "versions", "display_version", "notes")
+
     links_self: str
     preview_readonly: Optional[str]
     delete_with_reason: Optional[str]
@@ -60,37 +69,21 @@ class Links:
         if kwargs:
             pass
         self.links_self = links_self.get("href")
-        if preview_readonly is not None:
-            self.preview_readonly = preview_readonly.get("href")
-        else:
-            self.preview_readonly = None
-        if link_dms_object is not None:
-            self.link_dms_object = link_dms_object.get("href")
-        else:
-            self.link_dms_object = None
-        if delete_with_reason is not None:
-            self.delete_with_reason = delete_with_reason.get("href")
-        else:
-            self.delete_with_reason = None
+        self.preview_readonly = _href(preview_readonly)
+        self.link_dms_object = _href(link_dms_object)
+        self.delete_with_reason = _href(delete_with_reason)
         self.mainblobcontent = mainblobcontent.get("href")
-        if pdfblobcontent is not None:
-            self.pdfblobcontent = pdfblobcontent.get("href")
-        else:
-            self.pdfblobcontent = None
-        if update_with_content is not None:
-            self.update_with_content = update_with_content.get("href")
-        else:
-            self.update_with_content = None
-        if update is not None:
-            self.update = update.get("href")
-        else:
-            self.update = None
+        self.pdfblobcontent = _href(pdfblobcontent)
+        self.update_with_content = _href(update_with_content)
+        self.update = _href(update)
         self.versions = versions.get("href")
         self.display_version = display_version.get("href")
         self.notes = notes.get("href")
 
 
 class SourceProperty:
+    __slots__ = ("key", "value", "values", "is_multi_value", "display_value")
+
     key: str
     value: str
     values: Optional[list]
@@ -104,11 +97,16 @@ class SourceProperty:
         self.key = key
         self.value = value
         self.is_multi_value = is_multi_value
+        # Häufig ist der Anzeigewert identisch mit dem Wert, dann wird nur ein String gehalten
+        if display_value is not None and display_value == value:
+            display_value = value
         self.display_value = display_value
         self.values = values
 
 
 class SearchProperty:
+    __slots__ = ("key", "values")
+
     key: str
     values: list
 
@@ -119,84 +117,129 @@ class SearchProperty:
         self.values = values
 
 
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def parse_timestamp(raw: Optional[str]) -> Optional[datetime]:
+    if raw is None:
+        return None
+    # fromisoformat ist deutlich schneller als strptime, akzeptiert aber auch Zeitstempel ohne Zeitzone.
+    # Diese werden wie bisher über strptime verworfen.
+    try:
+        parsed = datetime.fromisoformat(raw)
+        if parsed.tzinfo is not None:
+            return parsed
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.strptime(raw, TIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_timestamp(value: datetime) -> str:
+    # Format der Zeitstempel im DMS, z.B. 2024-01-31T10:15:00.000+01:00
+    return value.isoformat(timespec="milliseconds")
+
+
+class _PropertyField:
+    # Liest ein Standardfeld erst beim ersten Zugriff aus den Eigenschaften und merkt sich das Ergebnis
+    # im zugehörigen Slot "_<name>" der Instanz
+    def __init__(self, prop_key: str, display_value: bool = False, timestamp: bool = False):
+        self.prop_key = prop_key
+        self.display_value = display_value
+        self.timestamp = timestamp
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        self.slot = f"_{name}"
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            pass
+        value = instance.get_prop_value(self.prop_key, return_display_value=self.display_value)
+        if self.timestamp:
+            value = parse_timestamp(value)
+        setattr(instance, self.slot, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+
+
 class DmsDocument:
+    __slots__ = ("links", "id_", "source_properties", "source_categories", "_prop_index",
+                 "_last_modified", "_last_alteration", "_editor", "_editor_display", "_owner", "_owner_display",
+                 "_caption", "_filename", "_filetype", "_filemimetype", "_creation_date", "_state", "_access_date",
+                 "_category", "_category_display")
+
     links: Links
     id_: str
-    last_modified: Optional[datetime]
-    last_alteration: Optional[datetime]
-    editor: Optional[str]
-    editor_display: Optional[str]
-    owner: Optional[str]
-    owner_display: Optional[str]
-    caption: Optional[str]
-    filename: Optional[str]
-    filetype: Optional[str]
-    filemimetype: Optional[str]
-    creation_date: Optional[datetime]
-    state: Optional[str]
-    access_date: Optional[datetime]
-    category: Optional[str]
-    category_display: Optional[str]
+    last_modified: Optional[datetime] = _PropertyField("property_last_modified_date", timestamp=True)
+    last_alteration: Optional[datetime] = _PropertyField("property_last_alteration_date", timestamp=True)
+    editor: Optional[str] = _PropertyField("property_editor")
+    editor_display: Optional[str] = _PropertyField("property_editor", display_value=True)
+    owner: Optional[str] = _PropertyField("property_owner")
+    owner_display: Optional[str] = _PropertyField("property_owner", display_value=True)
+    caption: Optional[str] = _PropertyField("property_caption")
+    filename: Optional[str] = _PropertyField("property_filename")
+    filetype: Optional[str] = _PropertyField("property_filetype")
+    filemimetype: Optional[str] = _PropertyField("property_filemimetype")
+    creation_date: Optional[datetime] = _PropertyField("property_creation_date", timestamp=True)
+    state: Optional[str] = _PropertyField("property_state")
+    access_date: Optional[datetime] = _PropertyField("property_access_date", timestamp=True)
+    category: Optional[str] = _PropertyField("property_category")
+    category_display: Optional[str] = _PropertyField("property_category", display_value=True)
     source_properties: List[SourceProperty]
     source_categories: List[str]
 
-    def __init__(self, links: Dict, id_: str, source_properties: List[Dict],
+    def __init__(self, links: Dict | Links, id_: str, source_properties: List[Dict | SourceProperty],
                  source_categories: List[str], **kwargs) -> None:
         if kwargs:
             pass
-        if links is not None:
+        # links und source_properties können als dict (decamelized) oder bereits als Modellobjekte übergeben werden
+        if links is not None and not isinstance(links, Links):
             links["links_self"] = links.pop("self")
             links = Links(**links)
         self.links = links
         self.id_ = id_
         tsource_properties = []
         for source_property in source_properties:
-            tprop = SourceProperty(**source_property)
-            tsource_properties.append(tprop)
+            if isinstance(source_property, SourceProperty):
+                tsource_properties.append(source_property)
+            else:
+                tsource_properties.append(SourceProperty(**source_property))
         self.source_properties = tsource_properties
         self.source_categories = source_categories
-
-        time_format = "%Y-%m-%dT%H:%M:%S.%f%z"
-        try:
-            last_modified_raw = get_prop_value(tsource_properties, prop_key="property_last_modified_date")
-            self.last_modified = datetime.strptime(last_modified_raw, time_format)
-        except (TypeError, ValueError):
-            self.last_modified = None
-
-        try:
-            last_alteration_raw = get_prop_value(tsource_properties, prop_key="property_last_alteration_date")
-            self.last_alteration = datetime.strptime(last_alteration_raw, time_format)
-        except (TypeError, ValueError):
-            self.last_alteration = None
-
-        try:
-            creation_date_raw = get_prop_value(tsource_properties, prop_key="property_creation_date")
-            self.creation_date = datetime.strptime(creation_date_raw, time_format)
-        except (TypeError, ValueError):
-            self.creation_date = None
-
-        try:
-            access_date_raw = get_prop_value(tsource_properties, prop_key="property_access_date")
-            self.access_date = datetime.strptime(access_date_raw, time_format)
-        except (TypeError, ValueError):
-            self.access_date = None
-
-        self.editor = get_prop_value(tsource_properties, prop_key="property_editor")
-        self.editor_display = get_prop_value(tsource_properties, prop_key="property_editor", return_display_value=True)
-        self.owner = get_prop_value(tsource_properties, prop_key="property_owner")
-        self.owner_display = get_prop_value(tsource_properties, prop_key="property_owner", return_display_value=True)
-
-        self.caption = get_prop_value(tsource_properties, prop_key="property_caption")
-        self.filename = get_prop_value(tsource_properties, prop_key="property_filename")
-        self.filetype = get_prop_value(tsource_properties, prop_key="property_filetype")
-        self.filemimetype = get_prop_value(tsource_properties, prop_key="property_filemimetype")
-        self.state = get_prop_value(tsource_properties, prop_key="property_state")
-        self.category = get_prop_value(tsource_properties, prop_key="property_category")
-        self.category_display = get_prop_value(tsource_properties, prop_key="property_category",
-                                               return_display_value=True)
+        # Der Index wird erst beim ersten Zugriff aufgebaut, solange kostet er keinen Speicher
+        self._prop_index = None
+
+    def get_source_property(self, prop_key: str) -> Optional[SourceProperty]:
+        prop_index = self._prop_index
+        if prop_index is None:
+            prop_index = {}
+            for prop in self.source_properties:
+                # Bei doppelten Schlüsseln gilt wie bei get_prop_value der erste Eintrag
+                prop_index.setdefault(prop.key, prop)
+            self._prop_index = prop_index
+        return prop_index.get(prop_key)
+
+    def get_prop_value(self, prop_key: str, return_display_value: bool = False):
+        prop_entry = self.get_source_property(prop_key)
+        if prop_entry is None:
+            return None
+        if return_display_value:
+            return prop_entry.display_value
+        return prop_entry.value
 
 
 class Category:
+    __slots__ = ("key", "display_name")
+
     key: UUID
     display_name: str
 
@@ -217,6 +260,8 @@ class TypeEnum(Enum):
 
 
 class Property:
+    __slots__ = ("key", "type_", "display_name")
+
     key: UUID
     type_: TypeEnum
     display_name: str
@@ -249,9 +294,45 @@ class Mappings:
         for cat in categories:
             cats.append(Category(**cat))
         self.categories = cats
+        self._build_indexes()
+
+    def _build_indexes(self):
+        # Indizes werden vollständig neu aufgebaut und erst danach zugewiesen
+        property_keys = {}
+        category_keys = {}
+        display_names = {}
+        property_types = {}
+        for prop in self.properties:
+            key = str(prop.key)
+            # Bei doppelten Namen gilt wie bisher der erste Eintrag
+            property_keys.setdefault(prop.display_name.lower(), key)
+            display_names.setdefault(key, prop.display_name)
+            property_types.setdefault(key, prop.type_)
+        for cat in self.categories:
+            key = str(cat.key)
+            category_keys.setdefault(cat.display_name.lower(), key)
+            display_names.setdefault(key, cat.display_name)
+        self._property_keys = property_keys
+        self._category_keys = category_keys
+        self._display_names = display_names
+        self._property_types = property_types
+
+    def property_key(self, display_name: str) -> Optional[str]:
+        return self._property_keys.get(display_name.lower())
+
+    def category_key(self, display_name: str) -> Optional[str]:
+        return self._category_keys.get(display_name.lower())
+
+    def display_name_of(self, key: str) -> Optional[str]:
+        return self._display_names.get(str(key))
+
+    def property_type(self, key: str):
+        return self._property_types.get(str(key))
 
 
 class DmsUser:
+    __slots__ = ("id_", "user_name", "first_name", "last_name", "display_name", "email_address")
+
     id_: str
     user_name: str
     first_name: str
@@ -273,3 +354,53 @@ class DmsUser:
     def __repr__(self):
         return f"{self.user_name} ({self.id_}) First: {self.first_name} Last: {self.last_name} Email: " \
                f"{self.email_address}"
+
+
+class ArchiveJob:
+    filepath: object
+    category_id: str
+    properties: List[Dict]
+    doc_id: Optional[str]
+    alteration_msg: Optional[str]
+    filename: Optional[str]
+
+    def __init__(self, filepath, category_id: str, properties: List[Dict] = None, doc_id: str = None,
+                 alteration_msg: str = None, filename: str = None, **kwargs) -> None:
+        if kwargs:
+            pass
+        self.filepath = filepath
+        self.category_id = category_id
+        self.properties = properties if properties is not None else []
+        self.doc_id = doc_id
+        self.alteration_msg = alteration_msg
+        self.filename = filename
+
+    def __repr__(self):
+        return f"ArchiveJob({self.filepath!r}, category_id={self.category_id!r}, doc_id={self.doc_id!r})"
+
+
+class BulkResult:
+    item: object
+    doc_id: Optional[str]
+    error: Optional[Exception]
+    bytes_transferred: int
+    path: Optional[str]
+
+    def __init__(self, item, doc_id: str = None, error: Exception = None, bytes_transferred: int = 0,
+                 path: str = None, **kwargs) -> None:
+        if kwargs:
+            pass
+        self.item = item
+        self.doc_id = doc_id
+        self.error = error
+        self.bytes_transferred = bytes_transferred
+        self.path = path
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        if self.success:
+            return f"BulkResult({self.doc_id}: ok)"
+        return f"BulkResult({self.doc_id}: {self.error!r})"
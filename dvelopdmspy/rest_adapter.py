@@ -1,15 +1,22 @@
 import logging
+import queue
+import threading
+import time
 
 import requests
+import requests.adapters
 import requests.packages
 import requests.utils
-import requests_cache
-from typing import Dict
-
-from jsonmerge import Merger
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 
+from dvelopdmspy.blob import DEFAULT_CHUNK_SIZE, check_blob_validator, parse_content_range_total
+from dvelopdmspy.cache import ResponseCache, endpoint_class
+from dvelopdmspy.coalesce import SingleFlight
 from dvelopdmspy.exceptions import DvelopDMSPyException
+from dvelopdmspy.metrics import EVENT_BLOB_DOWNLOAD, EVENT_BLOB_UPLOAD, EVENT_PAGES, EVENT_REQUEST, Event, \
+    Instrumentation
 from dvelopdmspy.models import Result
+from dvelopdmspy.throttle import RetryPolicy, THROTTLE_STATUSES, TokenBucket, parse_retry_after
 from json import JSONDecodeError
 
 
@@ -17,36 +24,250 @@ class RestAdapter:
     logger = logging.getLogger(__name__)
 
     def __init__(self, hostname: str, api_key: str, repository: str,
-                 logger: logging.Logger = None, user_agent: str = None):
+                 logger: logging.Logger = None, user_agent: str = None,
+                 pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, use_cache: bool = True, cache: ResponseCache = None,
+                 prefetch_pages: int = 0, scheme: str = "https", rate_limit: float = None,
+                 retry_policy: RetryPolicy = None, coalesce_requests: bool = True,
+                 hooks: Iterable[Callable[[Event], None]] = None, timeout: float = 60.0):
 
-        requests_cache.install_cache(backend='memory', expire_after=10800)
         if user_agent is None:
             self.user_agent = requests.utils.default_headers().get('User-Agent')
         else:
             self.user_agent = user_agent
         self._logger = logger or logging.getLogger(__name__)
+
+        # Eine Session pro Adapter, damit TCP/TLS-Verbindungen wiederverwendet werden.
+        # pool_connections: Anzahl der Hosts, für die Pools vorgehalten werden
+        # pool_maxsize: maximale Anzahl Verbindungen je Host
+        # pool_block: bei erschöpftem Pool warten statt zusätzliche Verbindungen zu öffnen
+        self.keep_alive = keep_alive
+        self._session = requests.Session()
+        http_adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections,
+                                                     pool_maxsize=pool_maxsize,
+                                                     pool_block=pool_block)
+        self._session.mount("https://", http_adapter)
+        self._session.mount("http://", http_adapter)
+        if not keep_alive:
+            self._session.headers['Connection'] = 'close'
+        # Zeitlimit in Sekunden für den Verbindungsaufbau und zwischen zwei empfangenen Datenblöcken.
+        # Auch ein Tupel (connect, read) ist möglich. Bei Überschreitung greift die Wiederholungsstrategie
+        self.timeout = timeout
+
+        # Der Cache gehört zu diesem Adapter und wird bei schreibenden Zugriffen auf Dokumente invalidiert
+        if use_cache:
+            self.cache = cache if cache is not None else ResponseCache()
+        else:
+            self.cache = None
+
+        # rate_limit: maximale Anfragen pro Sekunde (None = unbegrenzt, bis der Server drosselt). Die Rate wird
+        # bei 429/503 für alle Threads gemeinsam gesenkt, Retry-After pausiert alle Anfragen
+        self.rate_limiter = TokenBucket(rate_limit)
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+        # Hooks erhalten für jede Anfrage, jeden Seitenabruf und jede Blob-Übertragung ein Event
+        self.instrumentation = Instrumentation(hooks, self._logger)
+
+        # Gleichzeitige identische GET-Anfragen mehrerer Threads teilen sich eine Anfrage an den Server
+        self.single_flight = SingleFlight() if coalesce_requests else None
+
+        # Anzahl der Ergebnisseiten, die im Hintergrund vorab geladen werden (0 = keine)
+        self.prefetch_pages = prefetch_pages
+
         self.host_base = hostname
-        self.repolist_url = f"https://{hostname}/dms/r/"
+        self.host_url = f"{scheme}://{hostname}"
+        self.repolist_url = f"{self.host_url}/dms/r/"
         self.api_key = api_key
 
-        # Wird kein Repository angegeben, wird das erste ausgelesen und gesetzt
-        if repository is None:
-            t_repos = self.get(endpoint="", base_url=self.repolist_url)
-            self.repository = t_repos.data.get("repositories")[0].get("id")
-        else:
-            self.repository = repository
+        # Wird kein Repository angegeben, wird beim ersten Zugriff das erste ausgelesen und gesetzt
+        self._repository = repository
+        self._repository_lock = threading.Lock()
+        self.identity_url = f"{self.host_url}/identityprovider/"
+
+    @property
+    def repository(self) -> str:
+        if self._repository is None:
+            with self._repository_lock:
+                if self._repository is None:
+                    t_repos = self.get(endpoint="", base_url=self.repolist_url)
+                    self._repository = t_repos.data.get("repositories")[0].get("id")
+        return self._repository
+
+    @repository.setter
+    def repository(self, repository: str):
+        self._repository = repository
+
+    @property
+    def config_url(self) -> str:
+        return f"{self.host_url}/dmsconfig/r/{self.repository}/"
+
+    @property
+    def url(self) -> str:
+        return f"{self.host_url}/dms/r/{self.repository}/"
 
-        self.config_url = f"https://{hostname}/dmsconfig/r/{self.repository}/"
-        self.identity_url = f"https://{hostname}/identityprovider/"
-        self.url = f"https://{hostname}/dms/r/{self.repository}/"
+    def close(self):
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _emit(self, kind: str, started: float, **kwargs):
+        kwargs["duration"] = time.perf_counter() - started
+        self.instrumentation.emit(Event(kind, **kwargs))
+
+    def _send(self, http_method: str, url: str, headers: Dict, params: Dict = None, json: Dict = None,
+              data=None, stream: bool = False) -> requests.Response:
+        started = time.perf_counter()
+        cache_key = None
+        generation = None
+        if self.cache is not None:
+            if http_method == 'GET':
+                if self.cache.is_cacheable(url):
+                    cache_key = ResponseCache.make_key(url, params, headers.get('Accept'))
+                    generation = self.cache.generation
+                    cached = self.cache.get(cache_key)
+                    if cached is not None:
+                        self._logger.debug(msg=f"method={http_method}, url={url}, cache=hit")
+                        if self.instrumentation.enabled:
+                            self._emit(EVENT_REQUEST, started, method=http_method, endpoint_class=endpoint_class(url),
+                                       url=url, status_code=cached.status_code, bytes_in=len(cached.content),
+                                       cache_hit=True)
+                        return cached
+            else:
+                self.cache.invalidate_url(url)
+        cache_hit = False if cache_key is not None else None
+
+        if http_method == 'GET' and not stream and self.single_flight is not None:
+            flight_key = cache_key or ResponseCache.make_key(url, params, headers.get('Accept'))
+            response, leader = self.single_flight.do(
+                flight_key, lambda: self._send_with_retries(http_method=http_method, url=url, headers=headers,
+                                                            params=params, cache_hit=cache_hit))
+            if leader and cache_key is not None:
+                self.cache.set(cache_key, response, generation)
+            if not leader and self.instrumentation.enabled:
+                self._emit(EVENT_REQUEST, started, method=http_method, endpoint_class=endpoint_class(url), url=url,
+                           status_code=response.status_code, bytes_in=len(response.content), coalesced=True)
+            return response
+
+        try:
+            response = self._send_with_retries(http_method=http_method, url=url, headers=headers, params=params,
+                                               json=json, data=data, stream=stream, cache_hit=cache_hit)
+        finally:
+            if http_method != 'GET':
+                # Erneut invalidieren, falls parallel gelesen wurde, während die Änderung lief
+                if self.cache is not None:
+                    self.cache.invalidate_url(url)
+                if self.single_flight is not None:
+                    self.single_flight.forget_all()
+        if cache_key is not None:
+            self.cache.set(cache_key, response, generation)
+        return response
+
+    def _send_with_retries(self, http_method: str, url: str, headers: Dict, params: Dict = None, json: Dict = None,
+                           data=None, stream: bool = False, cache_hit: bool = None) -> requests.Response:
+        if not self.instrumentation.enabled:
+            return self._send_attempts(http_method=http_method, url=url, headers=headers, params=params, json=json,
+                                       data=data, stream=stream)
+        started = time.perf_counter()
+        retries = [0]
+        try:
+            response = self._send_attempts(http_method=http_method, url=url, headers=headers, params=params,
+                                           json=json, data=data, stream=stream, retries=retries)
+        except Exception as e:
+            self._emit(EVENT_REQUEST, started, method=http_method, endpoint_class=endpoint_class(url), url=url,
+                       retries=retries[0], cache_hit=cache_hit, error=e)
+            raise
+        # Bei gestreamten Antworten wird der Inhalt erst vom Aufrufer gelesen
+        bytes_in = int(response.headers.get('Content-Length') or 0) if stream else len(response.content)
+        body = response.request.body if response.request is not None else None
+        bytes_out = len(body) if isinstance(body, (bytes, str)) else 0
+        self._emit(EVENT_REQUEST, started, method=http_method, endpoint_class=endpoint_class(url), url=url,
+                   status_code=response.status_code, bytes_in=bytes_in, bytes_out=bytes_out, retries=retries[0],
+                   cache_hit=cache_hit)
+        return response
+
+    def _send_attempts(self, http_method: str, url: str, headers: Dict, params: Dict = None, json: Dict = None,
+                       data=None, stream: bool = False, retries: List[int] = None) -> requests.Response:
+        # Idempotente Anfragen werden bei Verbindungsfehlern und 429/5xx mit Backoff wiederholt.
+        # Datenströme (Dateiobjekte) können nicht erneut gesendet werden.
+        # retries: optionale Liste, in deren erstem Element die Anzahl der Wiederholungen abgelegt wird
+        attempt = 0
+        retryable_body = not hasattr(data, "read")
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                response = self._session.request(method=http_method, url=url, headers=headers, params=params,
+                                                 json=json, data=data, stream=stream, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not retryable_body or not self.retry_policy.can_retry(http_method, attempt):
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+                self._logger.debug(msg=f"method={http_method}, url={url}, retry in {delay:.2f}s after {e}")
+                attempt += 1
+                if retries is not None:
+                    retries[0] = attempt
+                time.sleep(delay)
+                continue
+
+            retry_after = None
+            if response.status_code in THROTTLE_STATUSES:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self.rate_limiter.on_throttled(retry_after)
+            else:
+                self.rate_limiter.on_success()
+
+            if not retryable_body or not self.retry_policy.should_retry_status(http_method, response.status_code,
+                                                                               attempt):
+                return response
+
+            delay = self.retry_policy.backoff(attempt, retry_after)
+            self._logger.debug(msg=f"method={http_method}, url={url}, status_code={response.status_code}, "
+                                   f"retry in {delay:.2f}s")
+            response.close()
+            attempt += 1
+            if retries is not None:
+                retries[0] = attempt
+            time.sleep(delay)
 
     def get_identity(self, endpoint: str):
         return self.get(endpoint=endpoint, base_url=self.identity_url)
 
     def get(self, endpoint: str, ep_params: Dict = None, base_url: str = None, binary: bool = False,
-            limit: int = None) -> Result:
+            limit: int = None, prefetch: int = None) -> Result:
         return self._do(http_method='GET', endpoint=endpoint, ep_params=ep_params, base_url=base_url, binary=binary,
-                        limit=limit)
+                        limit=limit, prefetch=prefetch)
+
+    def revalidate(self, endpoint: str, etag: str = None, last_modified: str = None,
+                   base_url: str = None) -> Optional[Result]:
+        # Bedingte Anfrage am Cache vorbei. None, wenn der Server 304 (unverändert) meldet
+        if base_url is None:
+            base_url = self.url
+        url = base_url + endpoint
+        headers = self._build_headers('GET')
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        try:
+            self._logger.debug(msg=f"method=GET, url={url}, conditional=True")
+            response = self._send_with_retries(http_method='GET', url=url, headers=headers,
+                                               params={"apiKey": self.api_key})
+        except requests.exceptions.RequestException as e:
+            self._logger.debug(msg=(str(e)))
+            raise DvelopDMSPyException("Request failed") from e
+
+        if response.status_code == 304:
+            return None
+        if not 200 <= response.status_code <= 299:
+            raise DvelopDMSPyException(f"{response.status_code}: {response.reason} --> {response.text}")
+        try:
+            data_out = response.json()
+        except JSONDecodeError as e:
+            raise DvelopDMSPyException(f"Bad JSON in response --> {response.text}") from e
+        return Result(response.status_code, message=response.reason, data=data_out, headers=response.headers)
 
     def post(self, endpoint: str, ep_params: Dict = None, data: Dict = None, binary_upload: bool = False,
              upload_file_path: str = None) -> Result:
@@ -61,9 +282,295 @@ class RestAdapter:
     def delete(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
         return self._do(http_method='DELETE', endpoint=endpoint, ep_params=ep_params, data=data)
 
+    def _build_headers(self, http_method: str, binary: bool = False) -> Dict:
+        headers = {
+            'User-Agent': self.user_agent,
+            'Authorization': f'Bearer {self.api_key}'
+        }
+
+        if binary:
+            headers['Accept'] = 'application/octet-stream'
+        else:
+            headers['Accept'] = 'application/hal+json'
+
+        if http_method == 'POST':
+            headers['Origin'] = self.host_url
+        return headers
+
+    def _fetch_page(self, url: str, headers: Dict, params: Dict = None) -> Dict:
+        log_line_pre = f"method=GET, url={url}"
+        log_line_post = ', '.join((log_line_pre, "success={}, status_code={}, message={}"))
+        try:
+            self._logger.debug(msg=log_line_pre)
+            response = self._send(http_method='GET', url=url, headers=headers, params=params)
+        except requests.exceptions.RequestException as e:
+            self._logger.debug(msg=(str(e)))
+            raise DvelopDMSPyException("Request failed") from e
+
+        is_success = 200 <= response.status_code <= 299
+        self._logger.debug(msg=log_line_post.format(is_success, response.status_code, response.reason))
+        if not is_success:
+            raise DvelopDMSPyException(f"{response.status_code}: {response.reason} --> {response.text}")
+
+        try:
+            return response.json()
+        except (ValueError, JSONDecodeError) as e:
+            raise DvelopDMSPyException(f"Bad JSON in response --> {response.text}") from e
+
+    def _next_url(self, jsresp: Dict):
+        next_link = jsresp.get("_links", {}).get("next")
+        if next_link is None:
+            return None
+        return f"{self.host_url}{next_link['href']}"
+
+    def _page_chain(self, url: str, headers: Dict, params: Dict = None) -> Iterator[Dict]:
+        # Folgt den next-Links und liefert jede Seite genau einmal geparst
+        while url is not None:
+            jsresp = self._fetch_page(url=url, headers=headers, params=params)
+            yield jsresp
+            url = self._next_url(jsresp)
+            params = None
+
+    @staticmethod
+    def _prefetched(pages: Iterator[Dict], depth: int) -> Iterator[Dict]:
+        # Ein Hintergrund-Thread lädt bis zu <depth> Seiten voraus, während die aktuelle Seite verarbeitet wird
+        page_queue = queue.Queue(maxsize=depth)
+        stop = threading.Event()
+        end_marker = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    page_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def producer():
+            try:
+                for page in pages:
+                    if not put((page, None)):
+                        return
+            except Exception as e:
+                put((None, e))
+            else:
+                put((end_marker, None))
+
+        thread = threading.Thread(target=producer, name="dvelopdmspy-prefetch", daemon=True)
+        thread.start()
+        try:
+            while True:
+                page, error = page_queue.get()
+                if error is not None:
+                    raise error
+                if page is end_marker:
+                    return
+                yield page
+        finally:
+            stop.set()
+
+    def _paginate(self, url: str, headers: Dict, params: Dict = None, prefetch: int = None) -> Iterator[Dict]:
+        if prefetch is None:
+            prefetch = self.prefetch_pages
+        pages = self._page_chain(url=url, headers=headers, params=params)
+        if prefetch and prefetch > 0:
+            return self._prefetched(pages, prefetch)
+        return pages
+
+    def iter_pages(self, endpoint: str, ep_params: Dict = None, base_url: str = None,
+                   prefetch: int = None) -> Iterator[List[Dict]]:
+        # Liefert die Treffer seitenweise. Mit prefetch > 0 werden die Folgeseiten im Hintergrund geladen
+        if base_url is None:
+            base_url = self.url
+
+        params = dict(ep_params) if ep_params is not None else {}
+        params["apiKey"] = self.api_key
+        headers = self._build_headers('GET')
+        url = base_url + endpoint
+
+        started = time.perf_counter()
+        pages = 0
+        items = 0
+        error = None
+        try:
+            for jsresp in self._paginate(url=url, headers=headers, params=params, prefetch=prefetch):
+                pages += 1
+                if "items" in jsresp:
+                    page = jsresp.get("items")
+                else:
+                    page = [jsresp]
+                items += len(page)
+                yield page
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.instrumentation.enabled:
+                self._emit(EVENT_PAGES, started, method='GET', endpoint_class=endpoint_class(url), url=url,
+                           pages=pages, items=items, error=error)
+
+    def iter_blob(self, url: str, offset: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  max_resume_attempts: int = 3, if_range: str = None, blob_info: dict = None) -> Iterator[bytes]:
+        # Lädt den Blob in Blöcken. Bricht die Verbindung ab, wird per Range-Request mit If-Range an der
+        # bisherigen Position fortgesetzt. Am Ende wird die Größe gegen den Server geprüft.
+        # if_range: Validator (ETag/Last-Modified) des Blobs, zu dem die Bytes vor offset gehören.
+        # blob_info erhält unter "validator" den Validator der ersten Antwort.
+        # Hat sich der Blob geändert, wird BlobChangedException ausgelöst
+        if not self.instrumentation.enabled:
+            yield from self._iter_blob(url, offset, chunk_size, max_resume_attempts, if_range=if_range,
+                                       blob_info=blob_info)
+            return
+        started = time.perf_counter()
+        progress = [offset, 0]
+        error = None
+        try:
+            yield from self._iter_blob(url, offset, chunk_size, max_resume_attempts, progress, if_range=if_range,
+                                       blob_info=blob_info)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._emit(EVENT_BLOB_DOWNLOAD, started, method='GET', endpoint_class=endpoint_class(url), url=url,
+                       bytes_in=progress[0] - offset, retries=progress[1], error=error)
+
+    def _iter_blob(self, url: str, offset: int, chunk_size: int, max_resume_attempts: int,
+                   progress: List[int] = None, if_range: str = None, blob_info: dict = None) -> Iterator[bytes]:
+        # progress: optionale Liste [empfangene Bytes inkl. offset, Fortsetzungsversuche]
+        received = offset
+        validator = if_range
+        expected = None
+        attempts = 0
+        while True:
+            if progress is not None:
+                progress[0] = received
+                progress[1] = attempts
+            headers = self._build_headers('GET', binary=True)
+            # Ohne Kompression beziehen sich Range und Content-Length auf dieselben Bytes wie received
+            headers['Accept-Encoding'] = 'identity'
+            if received > 0:
+                headers['Range'] = f'bytes={received}-'
+                if validator is not None:
+                    headers['If-Range'] = validator
+            log_line_pre = f"method=GET, url={url}, offset={received}"
+            try:
+                self._logger.debug(msg=log_line_pre)
+                response = self._send(http_method='GET', url=url, headers=headers, params={"apiKey": self.api_key},
+                                      stream=True)
+            except requests.exceptions.RequestException as e:
+                self._logger.debug(msg=(str(e)))
+                attempts += 1
+                if attempts > max_resume_attempts:
+                    raise DvelopDMSPyException("Blob download failed") from e
+                continue
+
+            with response:
+                if response.status_code == 416:
+                    total = parse_content_range_total(response.headers.get('Content-Range'))
+                    if total is not None and total == received:
+                        return
+                if not 200 <= response.status_code <= 299:
+                    raise DvelopDMSPyException(f"{response.status_code}: {response.reason} --> {response.text}")
+                first = validator is None
+                validator = check_blob_validator(validator, response.headers, response.status_code, received)
+                if first and blob_info is not None:
+                    blob_info["validator"] = validator
+
+                skip = 0
+                if response.status_code == 206:
+                    expected = parse_content_range_total(response.headers.get('Content-Range'))
+                else:
+                    # Der Server hat den Range-Header ignoriert, bereits geladene Bytes werden übersprungen
+                    skip = received
+                    content_length = response.headers.get('Content-Length')
+                    if content_length is not None and 'Content-Encoding' not in response.headers:
+                        expected = int(content_length)
+
+                try:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if skip:
+                            if len(chunk) <= skip:
+                                skip -= len(chunk)
+                                continue
+                            chunk = chunk[skip:]
+                            skip = 0
+                        received += len(chunk)
+                        if progress is not None:
+                            progress[0] = received
+                        yield chunk
+                except requests.exceptions.RequestException as e:
+                    self._logger.debug(msg=(str(e)))
+                    attempts += 1
+                    if attempts > max_resume_attempts:
+                        raise DvelopDMSPyException("Blob download failed") from e
+                    continue
+
+            if expected is not None and received < expected and attempts < max_resume_attempts:
+                attempts += 1
+                continue
+            if expected is not None and received != expected:
+                raise DvelopDMSPyException(f"Blob size mismatch: expected {expected} bytes, received {received}")
+            return
+
+    def upload_blob(self, chunks: Iterator[bytes], max_chunk_retries: int = 3) -> str:
+        # Der erste Block geht an blob/chunk/, jeder weitere an die Location der vorherigen Antwort.
+        # Schlägt ein Block fehl, wird nur dieser erneut gesendet.
+        url = f"{self.url}blob/chunk/"
+        started = time.perf_counter()
+        location = None
+        chunk_count = 0
+        bytes_out = 0
+        error = None
+        try:
+            for chunk in chunks:
+                location = self._upload_chunk(url, chunk, max_chunk_retries)
+                url = f"{self.host_url}{location}"
+                chunk_count += 1
+                bytes_out += len(chunk)
+            if not chunk_count:
+                location = self._upload_chunk(url, b"", max_chunk_retries)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.instrumentation.enabled:
+                self._emit(EVENT_BLOB_UPLOAD, started, method='POST', endpoint_class=endpoint_class(url), url=url,
+                           bytes_out=bytes_out, items=chunk_count, error=error)
+        return location
+
+    def _upload_chunk(self, url: str, chunk: bytes, max_chunk_retries: int) -> str:
+        headers = self._build_headers('POST')
+        headers['Content-Type'] = 'application/octet-stream'
+        log_line_pre = f"method=POST, url={url}, size={len(chunk)}"
+        log_line_post = ', '.join((log_line_pre, "success={}, status_code={}, message={}"))
+        attempts = 0
+        while True:
+            try:
+                self._logger.debug(msg=log_line_pre)
+                response = self._send(http_method='POST', url=url, headers=headers,
+                                      params={"apiKey": self.api_key}, data=chunk)
+            except requests.exceptions.RequestException as e:
+                self._logger.debug(msg=(str(e)))
+                if attempts >= max_chunk_retries:
+                    raise DvelopDMSPyException("Blob upload failed") from e
+                time.sleep(self.retry_policy.backoff(attempts))
+                attempts += 1
+                continue
+
+            is_success = 200 <= response.status_code <= 299
+            self._logger.debug(msg=log_line_post.format(is_success, response.status_code, response.reason))
+            if is_success:
+                if "location" not in response.headers:
+                    raise DvelopDMSPyException("BLOB upload failed. No blob location detected")
+                return response.headers["location"]
+            if (response.status_code < 500 and response.status_code != 429) or attempts >= max_chunk_retries:
+                raise DvelopDMSPyException(f"{response.status_code}: {response.reason} --> {response.text}")
+            time.sleep(self.retry_policy.backoff(attempts, parse_retry_after(response.headers.get('Retry-After'))))
+            attempts += 1
+
     def _do(self, http_method: str, endpoint: str, ep_params: Dict = None, data: Dict = None,
             base_url: str = None, binary: bool = False, limit: int = None, binary_upload: bool = False,
-            upload_file_path: str = None) -> Result:
+            upload_file_path: str = None, prefetch: int = None) -> Result:
 
         if base_url is None:
             base_url = self.url
@@ -74,68 +581,56 @@ class RestAdapter:
         ep_params["apiKey"] = self.api_key
 
         full_url = base_url + endpoint
-        headers = {
-            'User-Agent': self.user_agent,
-            'Authorization': f'Bearer {self.api_key}'
-        }
-
-        if binary:
-            headers['Accept'] = 'application/octet-stream'
-        else:
-            headers['Accept'] = 'application/hal+json'
-
-        if http_method == 'POST':
-            headers['Origin'] = f'https://{self.host_base}'
+        headers = self._build_headers(http_method, binary=binary)
 
         blobdata = None
         if binary_upload:
             headers['Content-Type'] = 'application/octet-stream'
 
+            # Die Datei wird nicht vollständig eingelesen, requests überträgt sie direkt aus dem Dateiobjekt
             try:
-                with open(upload_file_path, 'rb') as f:
-                    blobdata = f.read()
+                blobdata = open(upload_file_path, 'rb')
             except IOError as e:
                 self._logger.debug(msg=(str(e)))
                 raise DvelopDMSPyException("Blob upload failed") from e
 
         log_line_pre = f"method={http_method}, url={full_url}"
         log_line_post = ', '.join((log_line_pre, "success={}, status_code={}, message={}"))
-        merge_schema = {"mergeStrategy": "append"}
-        merger = Merger(schema=merge_schema)
 
+        started = time.perf_counter()
         try:
             self._logger.debug(msg=log_line_pre)
-            response = requests.request(method=http_method, url=full_url, headers=headers, params=ep_params, json=data,
-                                        data=blobdata)
+            response = self._send(http_method=http_method, url=full_url, headers=headers, params=ep_params,
+                                  json=data, data=blobdata)
         except requests.exceptions.RequestException as e:
             self._logger.debug(msg=(str(e)))
             raise DvelopDMSPyException("Request failed") from e
+        finally:
+            if blobdata is not None:
+                blobdata.close()
 
         if not binary and not binary_upload:
             data_out = None
             try:
                 jsresp = response.json()
-                data_out = jsresp
-                try:
-                    if "items" in jsresp.keys():
-                        data_out = jsresp.get("items")
-                    else:
-                        data_out = jsresp
-                except (ValueError, JSONDecodeError) as e:
-                    self._logger.debug(msg=log_line_post.format(False, None, e))
-                    raise DvelopDMSPyException(f"Bad JSON in response --> {response.text}") from e
-
-                if "_links" in jsresp.keys():
-                    doc_count = len(data_out)
-                    while "next" in response.json()['_links']:
-                        if limit is not None and doc_count >= limit:
+                if "items" in jsresp.keys():
+                    data_out = jsresp.get("items")
+                else:
+                    data_out = jsresp
+
+                next_url = self._next_url(jsresp) if "_links" in jsresp.keys() else None
+                if next_url is not None and (limit is None or len(data_out) < limit):
+                    pages = 1
+                    for page in self._paginate(url=next_url, headers=headers, prefetch=prefetch):
+                        pages += 1
+                        data_out.extend(page['items'])
+                        if limit is not None and len(data_out) >= limit:
                             break
-                        response = requests.request(method=http_method,
-                                                    url=f"https://"
-                                                        f"{self.host_base}{response.json()['_links']['next']['href']}",
-                                                    headers=headers)
-                        data_out = merger.merge(data_out, response.json()['items'])
-                        doc_count = len(data_out)
+                    if self.instrumentation.enabled:
+                        self._emit(EVENT_PAGES, started, method=http_method, endpoint_class=endpoint_class(full_url),
+                                   url=full_url, pages=pages, items=len(data_out))
+                if limit is not None and type(data_out) is list:
+                    del data_out[limit:]
             except JSONDecodeError:
                 pass
         else:
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from dvelopdmspy.exceptions import DvelopDMSPyException
+from dvelopdmspy.models import format_timestamp
+
+CREATION_DATE_KEY = "property_creation_date"
+
+
+class Shard:
+    # Teilrecherche einer aufgeteilten Suche: zusätzliche Eigenschaftsfilter und/oder Kategorien, die mit den
+    # Filtern der eigentlichen Recherche kombiniert werden
+    __slots__ = ("name", "properties", "categories")
+
+    def __init__(self, name: str, properties: dict = None, categories: list = None):
+        self.name = name
+        self.properties = properties
+        self.categories = categories
+
+    def apply(self, properties: Optional[dict], categories: Optional[list]) -> Tuple[Optional[dict], Optional[list]]:
+        if self.properties:
+            properties = dict(properties or {})
+            for key, values in self.properties.items():
+                if key in properties:
+                    raise DvelopDMSPyException(f"Shard '{self.name}' conflicts with the filter on '{key}'")
+                properties[key] = values
+        if self.categories is not None:
+            categories = self.categories
+        return properties, categories
+
+    def __repr__(self):
+        return f"Shard({self.name})"
+
+
+def category_shards(category_keys: List[str]) -> List[Shard]:
+    # Eine Teilrecherche je Kategorie. Dokumente ohne Kategorie werden dabei nicht gefunden
+    return [Shard(f"category:{key}", categories=[key]) for key in dict.fromkeys(category_keys)]
+
+
+def date_shards(start: datetime, end: datetime, count: int, property_key: str = CREATION_DATE_KEY) -> List[Shard]:
+    # Teilt den Zeitraum in count gleich lange Bereiche. Der erste und der letzte Bereich sind nach außen offen,
+    # damit auch Dokumente außerhalb von start/end gefunden werden. Dokumente genau auf einer Grenze
+    # liegen in zwei Bereichen und werden beim Zusammenführen nur einmal geliefert.
+    if count < 1:
+        raise DvelopDMSPyException("count must be at least 1")
+    if end <= start:
+        raise DvelopDMSPyException("end must be after start")
+    if count == 1:
+        return [Shard("all")]
+    step = (end - start) / count
+    bounds = [start + step * i for i in range(1, count)]
+    lowers = [""] + [format_timestamp(bound) for bound in bounds]
+    uppers = [format_timestamp(bound) for bound in bounds] + [""]
+    return [Shard(f"{property_key}:{lower}|{upper}", properties={property_key: [f"{lower}|{upper}"]})
+            for lower, upper in zip(lowers, uppers)]
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+SNAPSHOT_VERSION = 1
+
+
+def load_snapshot(path: str, host: str, repository: str = None) -> Optional[Dict]:
+    # Liefert den gespeicherten Stand der Mappings oder None, wenn die Datei fehlt, beschädigt ist
+    # oder zu einem anderen Host/Repository gehört
+    try:
+        with open(path, encoding="utf-8") as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if snapshot.get("host") != host or not isinstance(snapshot.get("data"), dict):
+        return None
+    if repository is not None and snapshot.get("repository") != repository:
+        return None
+    return snapshot
+
+
+def save_snapshot(path: str, host: str, repository: str, data: Dict, etag: str = None,
+                  last_modified: str = None):
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "host": host,
+        "repository": repository,
+        "etag": etag,
+        "last_modified": last_modified,
+        "saved_at": time.time(),
+        "data": data,
+    }
+    write_json_atomic(path, snapshot)
+
+
+def write_json_atomic(path: str, data, fsync: bool = False):
+    # Erst in eine temporäre Datei im selben Verzeichnis schreiben und dann ersetzen,
+    # damit parallel startende Prozesse nie eine halb geschriebene Datei lesen.
+    # fsync: Inhalt vor dem Ersetzen auf den Datenträger schreiben, damit er auch einen Absturz übersteht
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file)
+            if fsync:
+                json_file.flush()
+                os.fsync(json_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,161 @@
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from dvelopdmspy.dvelopdmspy import DvelopDmsPy
+from dvelopdmspy.exceptions import DvelopDMSPyException
+from dvelopdmspy.models import DmsDocument, format_timestamp, parse_timestamp
+from dvelopdmspy.snapshot import write_json_atomic
+
+CHECKPOINT_VERSION = 1
+
+# Zeitstempel-Attribut von DmsDocument -> Eigenschaftsschlüssel für Filter und Sortierung
+SYNC_FIELDS = {
+    "last_alteration": "property_last_alteration_date",
+    "last_modified": "property_last_modified_date",
+}
+
+
+def since_filter(value: datetime) -> List[str]:
+    # Bereichssuche "von|bis", die obere Grenze bleibt offen
+    return [f"{format_timestamp(value)}|"]
+
+
+class SyncCheckpoint:
+    # Hochwassermarke eines Abgleichs: der größte bereits übergebene Zeitstempel und die IDs aller Dokumente
+    # mit genau diesem Zeitstempel. Damit werden Dokumente mit gleichem Zeitstempel an einer Seitengrenze
+    # weder doppelt noch gar nicht übergeben.
+    __slots__ = ("field", "watermark", "seen_ids", "delivered")
+
+    def __init__(self, field: str, watermark: datetime = None, seen_ids: List[str] = None, delivered: int = 0):
+        self.field = field
+        self.watermark = watermark
+        self.seen_ids = set(seen_ids or ())
+        self.delivered = delivered
+
+    @classmethod
+    def load(cls, path: str, field: str) -> "SyncCheckpoint":
+        try:
+            with open(path, encoding="utf-8") as checkpoint_file:
+                data = json.load(checkpoint_file)
+        except FileNotFoundError:
+            return cls(field)
+        except (OSError, ValueError) as e:
+            raise DvelopDMSPyException(f"Unreadable sync checkpoint {path}") from e
+        if data.get("version") != CHECKPOINT_VERSION or data.get("field") != field:
+            raise DvelopDMSPyException(f"Sync checkpoint {path} does not belong to field '{field}'")
+        watermark = parse_timestamp(data.get("watermark")) if data.get("watermark") else None
+        return cls(field, watermark, data.get("seen_ids"), data.get("delivered", 0))
+
+    def save(self, path: str):
+        write_json_atomic(path, {
+            "version": CHECKPOINT_VERSION,
+            "field": self.field,
+            "watermark": format_timestamp(self.watermark) if self.watermark is not None else None,
+            "seen_ids": sorted(self.seen_ids),
+            "delivered": self.delivered,
+            "saved_at": time.time(),
+        }, fsync=True)
+
+    def is_delivered(self, timestamp: datetime, doc_id: str) -> bool:
+        if self.watermark is None:
+            return False
+        if timestamp < self.watermark:
+            return True
+        return timestamp == self.watermark and doc_id in self.seen_ids
+
+    def advance(self, timestamp: datetime, doc_id: str):
+        if self.watermark is None or timestamp > self.watermark:
+            self.watermark = timestamp
+            self.seen_ids = {doc_id}
+        elif timestamp == self.watermark:
+            self.seen_ids.add(doc_id)
+        self.delivered += 1
+
+
+class DeltaSync:
+    # Übergibt alle seit dem letzten Lauf geänderten Dokumente seitenweise an sink.
+    # Jede Seite wird mit einer eigenen Recherche ab der Hochwassermarke (einschließlich) geholt, aufsteigend
+    # sortiert nach dem Zeitstempel.
+    # Nach jeder erfolgreich verarbeiteten Seite wird der Checkpoint sicher gespeichert. Bricht ein Lauf ab,
+    # setzt der nächste dort fort; die zuletzt nicht bestätigte Seite wird erneut übergeben (mindestens einmal),
+    # der sink sollte daher idempotent sein.
+    def __init__(self, client: DvelopDmsPy, checkpoint_path: str, sink: Callable[[List[DmsDocument]], None],
+                 field: str = "last_alteration", properties: Dict = None, categories: List = None,
+                 start: datetime = None, page_size: int = None):
+        if field not in SYNC_FIELDS:
+            raise DvelopDMSPyException(f"Unsupported sync field '{field}', use one of {', '.join(SYNC_FIELDS)}")
+        if start is not None and start.tzinfo is None:
+            raise DvelopDMSPyException("start must be timezone-aware")
+        self.client = client
+        self.checkpoint_path = checkpoint_path
+        self.sink = sink
+        self.field = field
+        self.properties = properties
+        self.categories = categories
+        self.start = start
+        self.page_size = page_size
+
+    def load_checkpoint(self) -> SyncCheckpoint:
+        checkpoint = SyncCheckpoint.load(self.checkpoint_path, self.field)
+        if checkpoint.watermark is None and self.start is not None:
+            checkpoint.watermark = self.start
+        return checkpoint
+
+    def run(self, max_pages: int = None) -> int:
+        # Liefert die Anzahl der in diesem Lauf übergebenen Dokumente.
+        # max_pages begrenzt die Anzahl der an sink übergebenen Seiten, ein weiterer Lauf setzt dort fort
+        checkpoint = self.load_checkpoint()
+        delivered = 0
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            batch = self._next_batch(checkpoint)
+            if not batch:
+                break
+            self.sink([doc for _, doc in batch])
+            for timestamp, doc in batch:
+                checkpoint.advance(timestamp, doc.id_)
+            checkpoint.save(self.checkpoint_path)
+            delivered += len(batch)
+            pages += 1
+        return delivered
+
+    def _next_batch(self, checkpoint: SyncCheckpoint) -> list:
+        # Nach jeder bestätigten Seite wird eine neue Recherche ab der Hochwassermarke gestellt (Keyset-Paginierung)
+        # statt den next-Links zu folgen. Deren Seiten beruhen auf Offsets: wird während des Laufs ein Dokument
+        # geändert, rückt es ans Ende und alle folgenden Treffer eine Position nach vorne, sodass eines übersprungen
+        # würde. Nur wenn eine Seite ausschließlich bereits übergebene Dokumente mit gleichem Zeitstempel enthält,
+        # wird innerhalb derselben Recherche weitergeblättert.
+        prop_key = SYNC_FIELDS[self.field]
+        properties = dict(self.properties or {})
+        if checkpoint.watermark is not None:
+            properties[prop_key] = since_filter(checkpoint.watermark)
+        pages = self.client.iter_document_pages(properties=properties or None, categories=self.categories,
+                                                page_size=self.page_size, sort_property=prop_key, ascending=True)
+        try:
+            for page in pages:
+                batch = []
+                for doc in page:
+                    timestamp = getattr(doc, self.field)
+                    # Ignoriert der Server den Filter, wird hier clientseitig gefiltert
+                    if timestamp is None or checkpoint.is_delivered(timestamp, doc.id_):
+                        continue
+                    batch.append((timestamp, doc))
+                if batch:
+                    return batch
+        finally:
+            pages.close()
+        return []
+
+    def reset(self):
+        # Nächster Lauf beginnt wieder bei start bzw. mit allen Dokumenten
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        return self.load_checkpoint().watermark
@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Optional
+
+# Antworten, mit denen der Server signalisiert, dass er Last abwirft
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After enthält entweder Sekunden oder ein HTTP-Datum
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    # Token-Bucket mit adaptiver Rate (AIMD): bei 429/503 wird die Rate multiplikativ gesenkt,
+    # nach erfolgreichen Anfragen langsam wieder bis max_rate angehoben.
+    # Ohne rate ist der Bucket zunächst unbegrenzt. Drosselt der Server, beginnt die Begrenzung bei der
+    # zuletzt gemessenen Anfragerate und endet wieder, sobald diese erneut erreicht ist
+    def __init__(self, rate: float = None, burst: int = None, min_rate: float = 0.5, decrease_factor: float = 0.5,
+                 increase_step: float = None):
+        self.adaptive_only = not rate
+        self.decrease_factor = decrease_factor
+        self._min_rate = min_rate
+        self._burst = burst
+        self._increase_step = increase_step
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        # Zeitpunkte der letzten Anfragen, aus denen ohne feste Rate die aktuelle Rate geschätzt wird
+        self._recent = deque(maxlen=50)
+        self.rate = None
+        if rate:
+            self._limit(float(rate))
+
+    def _limit(self, rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(float(self._min_rate), rate)
+        self.burst = self._burst if self._burst is not None else max(1, int(rate))
+        self.increase_step = self._increase_step if self._increase_step is not None else max(rate / 100, 0.01)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _observed_rate(self, now: float) -> float:
+        if len(self._recent) < 2 or now <= self._recent[0]:
+            return float(self._min_rate)
+        return (len(self._recent) - 1) / (now - self._recent[0])
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        # Nimmt ein Token und liefert die Wartezeit in Sekunden bis zu dessen Verfügbarkeit
+        with self._lock:
+            now = time.monotonic()
+            if self.rate is None:
+                self._recent.append(now)
+                return max(0.0, self._blocked_until - now)
+            self._refill(now)
+            self._tokens -= 1
+            wait = 0.0
+            if self._tokens < 0:
+                wait = -self._tokens / self.rate
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_throttled(self, retry_after: float = None):
+        with self._lock:
+            now = time.monotonic()
+            if self.rate is None:
+                self._limit(self._observed_rate(now))
+                self._recent.clear()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def on_success(self):
+        with self._lock:
+            if self.rate is not None and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                if self.adaptive_only and self.rate >= self.max_rate:
+                    self.rate = None
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 3, backoff_factor: float = 0.5, max_backoff: float = 30.0,
+                 retry_statuses: Iterable[int] = (429, 502, 503, 504),
+                 idempotent_methods: Iterable[str] = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_methods = frozenset(m.upper() for m in idempotent_methods)
+
+    def can_retry(self, http_method: str, attempt: int) -> bool:
+        return attempt < self.max_retries and http_method.upper() in self.idempotent_methods
+
+    def should_retry_status(self, http_method: str, status_code: int, attempt: int) -> bool:
+        return status_code in self.retry_statuses and self.can_retry(http_method, attempt)
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        # Exponentielles Backoff mit "full jitter". Ein Retry-After des Servers hat Vorrang
+        delay = random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
@@ -10,11 +10,10 @@ setup(
     license='GPL-3.0',
     packages=['dvelopdmspy'],
     install_requires=['requests>=2.0',
-                      'requests-cache>=1.1.0',
                       'pyhumps>=3.0',
-                      'jsonmerge>=1.9',
                       'pyhumps>=3.8'
                       ],
+    extras_require={'async': ['httpx>=0.24']},
 
     classifiers=[
         'Development Status :: 5 - Production/Stable',
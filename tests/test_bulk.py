@@ -0,0 +1,16 @@
+from benchmarks.mock_server import MockConfig, start_server
+from dvelopdmspy.dvelopdmspy import DvelopDmsPy
+
+
+def test_failed_items_report_their_document_id(tmp_path):
+    server = start_server(MockConfig(docs=10))
+    client = DvelopDmsPy(f"127.0.0.1:{server.server_port}", "k", scheme="http")
+    try:
+        results = client.update_properties_many({"BAD": [], "P00000001": []})
+        assert [(r.doc_id, r.success) for r in results] == [("BAD", False), ("P00000001", True)]
+
+        results = client.download_many(["BAD"], str(tmp_path))
+        assert [(r.doc_id, r.success) for r in results] == [("BAD", False)]
+    finally:
+        client.close()
+        server.shutdown()
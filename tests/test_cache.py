@@ -0,0 +1,26 @@
+from benchmarks.mock_server import MockConfig, start_server
+from dvelopdmspy.dvelopdmspy import DvelopDmsPy
+
+
+def test_read_overlapping_an_update_is_not_cached():
+    # Die Antwort auf den Lesezugriff kommt erst nach der Änderung an und darf daher nicht im Cache landen
+    server = start_server(MockConfig(docs=10))
+    client = DvelopDmsPy(f"127.0.0.1:{server.server_port}", "k", scheme="http")
+    adapter = client._rest_adapter
+    send = adapter._send_with_retries
+
+    def send_then_update(**kwargs):
+        response = send(**kwargs)
+        if kwargs["http_method"] == "GET" and "/o2m/P00000001" in kwargs["url"]:
+            client.update_properties("P00000001", [], state_change=False)
+        return response
+
+    try:
+        adapter._send_with_retries = send_then_update
+        before = client.get_documents(doc_id="P00000001")[0].last_alteration
+        adapter._send_with_retries = send
+        after = client.get_documents(doc_id="P00000001")[0].last_alteration
+        assert after != before
+    finally:
+        client.close()
+        server.shutdown()
@@ -0,0 +1,58 @@
+import sqlite3
+import threading
+
+from benchmarks.mock_server import MockConfig, start_server
+from dvelopdmspy.disk_cache import KIND_DOCUMENT, DiskCache
+from dvelopdmspy.dvelopdmspy import DvelopDmsPy
+
+
+def test_locked_database_falls_back_to_the_server(tmp_path):
+    server = start_server(MockConfig(docs=20))
+    path = str(tmp_path / "cache.db")
+    cache = DiskCache(path, busy_timeout=0.1)
+    client = DvelopDmsPy(f"127.0.0.1:{server.server_port}", "k", scheme="http", use_cache=False, disk_cache=cache)
+    client.get_documents(doc_id="P00000001")
+    blocker = sqlite3.connect(path, isolation_level=None)
+    try:
+        blocker.execute("BEGIN EXCLUSIVE")
+        assert len(client.get_documents()) == 20
+        assert client.get_documents(doc_id="P00000002")[0].id_ == "P00000002"
+        assert client.update_properties("P00000001", [], state_change=False)
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+        client.close()
+        cache.close()
+        server.shutdown()
+
+
+def test_close_closes_the_connections_of_all_threads(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.db"))
+    opened = threading.Barrier(5)
+    done = threading.Event()
+
+    def worker(doc_id: str):
+        cache.put("scope", KIND_DOCUMENT, doc_id, b"{}")
+        opened.wait(timeout=10)
+        done.wait(timeout=10)
+
+    threads = [threading.Thread(target=worker, args=(f"D{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        opened.wait(timeout=10)
+        connections = list(cache._connections.values())
+        assert len(connections) == 5
+        cache.close()
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+    for conn in connections:
+        try:
+            conn.execute("SELECT 1")
+            assert False, "connection still open"
+        except sqlite3.ProgrammingError:
+            pass
+    assert cache.get("scope", KIND_DOCUMENT, "D0") == b"{}"
+    cache.close()
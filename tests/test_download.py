@@ -0,0 +1,48 @@
+from benchmarks.mock_server import MockConfig, make_blob, start_server
+from dvelopdmspy.blob import write_part_validator
+from dvelopdmspy.dvelopdmspy import DvelopDmsPy
+
+BLOB_HREF = "/dms/r/bench-repo/o/P00000001/v/current/b/main/c"
+
+
+def test_part_file_of_changed_blob_is_not_resumed(tmp_path):
+    # Der .part-Rest stammt von einem älteren Stand des Blobs und muss verworfen werden
+    server = start_server(MockConfig(docs=10, blob_size=20000))
+    host = f"127.0.0.1:{server.server_port}"
+    client = DvelopDmsPy(host, "k", scheme="http", use_cache=False)
+    dest = str(tmp_path / "blob.bin")
+    blob = make_blob(20000)
+    try:
+        with open(f"{dest}.part", "wb") as part:
+            part.write(b"Z" * 5000)
+        write_part_validator(f"{dest}.part", f"http://{host}{BLOB_HREF}", '"P00000001-old"')
+        client.download_doc_blob("P00000001", dest, dl_href=BLOB_HREF)
+        with open(dest, "rb") as result:
+            assert result.read() == blob
+
+        with open(f"{dest}.part", "wb") as part:
+            part.write(blob[:5000])
+        write_part_validator(f"{dest}.part", f"http://{host}{BLOB_HREF}", '"P00000001-0"')
+        client.download_doc_blob("P00000001", dest, dl_href=BLOB_HREF)
+        with open(dest, "rb") as result:
+            assert result.read() == blob
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_download_many_skips_duplicates_and_colliding_targets(tmp_path):
+    server = start_server(MockConfig(docs=10, blob_size=30000))
+    client = DvelopDmsPy(f"127.0.0.1:{server.server_port}", "k", scheme="http", use_cache=False)
+    try:
+        docs = client.get_documents(limit=6)
+        results = client.download_many(docs + docs, str(tmp_path), name_template="{category}{ext}", max_workers=4)
+        downloaded = [r for r in results if r.success]
+        failed = [r for r in results if not r.success]
+        assert len(results) == 6
+        assert len({r.path for r in downloaded}) == len(downloaded) == len({doc.category for doc in docs})
+        assert all("is already used by document" in str(r.error) for r in failed)
+        assert all(path.read_bytes() == make_blob(30000) for path in tmp_path.iterdir())
+    finally:
+        client.close()
+        server.shutdown()
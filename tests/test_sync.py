@@ -0,0 +1,25 @@
+from benchmarks.mock_server import MockConfig, start_server
+from dvelopdmspy.dvelopdmspy import DvelopDmsPy
+from dvelopdmspy.sync import DeltaSync
+
+
+def test_edit_during_run_does_not_skip_documents(tmp_path):
+    # Eine Änderung während des Laufs verschiebt die Trefferliste, trotzdem muss jedes Dokument ankommen
+    server = start_server(MockConfig(docs=300, props=15))
+    client = DvelopDmsPy(f"127.0.0.1:{server.server_port}", "k", scheme="http", use_cache=False)
+    checkpoint = str(tmp_path / "checkpoint.json")
+    delivered = []
+
+    def sink(docs):
+        if not delivered:
+            client.update_properties("P00000000", [], state_change=False)
+        delivered.extend(doc.id_ for doc in docs)
+
+    try:
+        sync = DeltaSync(client, checkpoint, sink, page_size=40)
+        sync.run()
+        assert {f"P{i:08d}" for i in range(300)} <= set(delivered)
+        assert sync.run() == 0
+    finally:
+        client.close()
+        server.shutdown()
@@ -0,0 +1,31 @@
+from dvelopdmspy.dvelopdmspy import DvelopDmsPy
+from dvelopdmspy.throttle import TokenBucket
+
+
+def test_unlimited_bucket_starts_throttling_on_first_429():
+    bucket = TokenBucket()
+    assert all(bucket.reserve() == 0 for _ in range(100))
+    bucket.on_throttled(retry_after=2)
+    assert bucket.rate is not None and bucket.rate == bucket.max_rate * bucket.decrease_factor
+    # Die Pause gilt für alle folgenden Anfragen, nicht nur für die gedrosselte
+    assert 1.5 < bucket.reserve() <= 2
+    assert 1.5 < bucket.reserve() <= 2
+
+
+def test_unlimited_bucket_returns_to_unlimited_after_recovery():
+    bucket = TokenBucket()
+    for _ in range(10):
+        bucket.reserve()
+    bucket.on_throttled()
+    for _ in range(1000):
+        bucket.on_success()
+    assert bucket.rate is None
+    assert bucket.reserve() == 0
+
+
+def test_client_shares_one_adaptive_limiter_by_default():
+    client = DvelopDmsPy("localhost", "k", repository="repo")
+    try:
+        assert client._rest_adapter.rate_limiter.adaptive_only
+    finally:
+        client.close()